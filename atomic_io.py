@@ -0,0 +1,76 @@
+"""
+原子写入模块
+先写入同目录下的临时文件并 fsync，再用 rename 替换目标文件，避免写入中途崩溃导致文件被截断
+"""
+import json
+import os
+import shutil
+import tempfile
+
+
+def atomic_write(file_path, content, backup_count=0):
+    """原子地写入文件内容（str 或 bytes），可选保留最近 backup_count 份旧文件"""
+    file_path = os.fspath(file_path)
+    directory = os.path.dirname(os.path.abspath(file_path))
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(file_path) + ".", suffix=".tmp", dir=directory)
+    try:
+        # mkstemp 创建的文件只有所有者可读写，沿用原文件的权限
+        os.chmod(temp_path, os.stat(file_path).st_mode & 0o777 if os.path.exists(file_path) else 0o644)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if backup_count > 0 and os.path.exists(file_path):
+            _rotate_backups(file_path, backup_count)
+
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+    _fsync_directory(directory)
+
+
+def atomic_write_json(file_path, data, backup_count=0, **dump_kwargs):
+    """原子地写入 JSON 文件"""
+    atomic_write(file_path, json.dumps(data, **dump_kwargs), backup_count)
+
+
+def _rotate_backups(file_path, backup_count):
+    """滚动备份：file.bak.1 为最近一份，最多保留 backup_count 份"""
+    for index in range(backup_count - 1, 0, -1):
+        older = f"{file_path}.bak.{index}"
+        if os.path.exists(older):
+            os.replace(older, f"{file_path}.bak.{index + 1}")
+
+    newest = f"{file_path}.bak.1"
+    try:
+        if os.path.exists(newest):
+            os.remove(newest)
+        # 硬链接不复制数据，随后替换目标文件时旧内容仍由备份保留
+        os.link(file_path, newest)
+    except OSError:
+        shutil.copy2(file_path, newest)
+
+
+def _fsync_directory(directory):
+    """同步目录项，确保 rename 落盘（不支持的平台上忽略）"""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
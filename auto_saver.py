@@ -0,0 +1,101 @@
+"""
+自动保存模块
+合并短时间内的多次保存请求，在后台线程中写入文件
+"""
+import threading
+import time
+
+
+class AutoSaver:
+    """延迟合并的后台自动保存器"""
+
+    def __init__(self, save_func, delay=0.5):
+        self.save_func = save_func  # 实际执行保存的函数
+        self.delay = delay  # 合并窗口（秒）：窗口内的多次修改只写入一次
+
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()  # 保证同一时刻只有一次写入
+        self._pending = False  # 是否有尚未写入的修改
+        self._due_time = 0.0  # 本次合并窗口的到期时间
+        self._closed = False
+
+        # 统计计数
+        self.requested_count = 0  # 收到的保存请求数
+        self.saved_count = 0  # 实际写入次数
+        self.coalesced_count = 0  # 被合并（省去）的保存次数
+
+        self._thread = threading.Thread(target=self._run, name="AutoSaver", daemon=True)
+        self._thread.start()
+
+    def request_save(self):
+        """请求保存（立即返回，在合并窗口结束后由后台线程写入）"""
+        with self._cond:
+            if self._closed:
+                return
+            self.requested_count += 1
+            if self._pending:
+                self.coalesced_count += 1
+            else:
+                # 合并窗口从第一次未保存的修改开始计算，持续修改也不会无限推迟写入
+                self._pending = True
+                self._due_time = time.monotonic() + self.delay
+                self._cond.notify()
+
+    def flush(self):
+        """立即写入尚未保存的修改，并等待正在进行的写入完成"""
+        with self._cond:
+            pending = self._pending
+            self._pending = False
+
+        if pending:
+            self._write()
+        else:
+            # 等待后台线程正在进行的写入
+            with self._write_lock:
+                pass
+
+    def close(self):
+        """写入剩余修改并停止后台线程（应用关闭时调用）"""
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=5)
+
+    def has_pending(self):
+        """是否有尚未写入的修改"""
+        return self._pending
+
+    def get_stats(self):
+        """获取保存统计信息"""
+        return {
+            "requested": self.requested_count,
+            "saved": self.saved_count,
+            "coalesced": self.coalesced_count,
+        }
+
+    def _run(self):
+        """后台线程：等待合并窗口结束后写入"""
+        while True:
+            with self._cond:
+                while not self._closed and not self._pending:
+                    self._cond.wait()
+                if self._closed:
+                    return
+
+                remaining = self._due_time - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                self._pending = False
+
+            self._write()
+
+    def _write(self):
+        """执行一次保存"""
+        with self._write_lock:
+            try:
+                self.save_func()
+            except Exception as e:
+                print(f"自动保存失败: {e}")
+            self.saved_count += 1
@@ -0,0 +1,292 @@
+"""
+二进制快照存储模块
+按列紧凑存储任务数据：时间保存为整数微秒，分类、优先级、时间格式等重复字符串只保存一次，整体 zlib 压缩
+
+用法（在 JSON 与二进制快照之间转换）:
+    python binary_storage.py todo_data.json todo_data.tdb
+    python binary_storage.py todo_data.tdb todo_data.json
+"""
+import os
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime, timedelta
+from data_storage import DataStorage
+from atomic_io import atomic_write
+
+
+MAGIC = b"TDB1"
+FORMAT_VERSION = 2  # 版本 2 增加子任务 id 列，仍可读取版本 1
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_NO_TIME = -(2 ** 63)  # 表示时间为空
+
+
+class BinaryStorage(DataStorage):
+    """二进制快照数据存储类（.tdb 文件）"""
+
+    def load_data(self):
+        """从文件加载数据，返回与 JSON 文件相同结构的字典（时间字段为 datetime）"""
+        if not os.path.exists(self.file_path):
+            return None
+
+        try:
+            with open(self.file_path, 'rb') as f:
+                return self._unpack(f.read())
+        except Exception as e:
+            print(f"加载数据失败: {e}")
+            return None
+
+    def load_stream(self):
+        """按列存储的快照需整体解码，解码后再逐个产生任务"""
+        return self._split_data(self.load_data())
+
+    def _serialize_time(self, value):
+        """二进制快照直接保存 datetime，写入时再编码为整数"""
+        return value
+
+    def _write_data(self, data):
+        """将数据字典编码后写入文件"""
+        try:
+            atomic_write(self.file_path, self._pack(data), self.backup_count)
+            return True
+        except Exception as e:
+            print(f"保存数据失败: {e}")
+            return False
+
+    @staticmethod
+    def _pack(data):
+        """将数据字典编码为二进制快照"""
+        strings = _StringTable()
+        tasks = data.get("tasks", [])
+
+        out = bytearray()
+        out += struct.pack("<I", strings.index(data.get("sort_mode", "default")))
+        out += struct.pack("<q", _encode_time(DataStorage._deserialize_time(data.get("saved_at"))))
+
+        categories = data.get("categories", [])
+        out += struct.pack("<I", len(categories))
+        for category in categories:
+            out += struct.pack("<III", strings.index(category["name"]),
+                               strings.index(category.get("icon")), strings.index(category.get("color")))
+
+        # 按列保存任务字段
+        flags = bytearray()
+        priorities = array("I")
+        category_codes = array("I")
+        format_codes = array("I")
+        created_times = array("q")
+        completed_times = array("q")
+        subtask_counts = array("I")
+        subtask_flags = bytearray()
+        ids, texts, subtask_ids, subtask_texts = [], [], [], []
+
+        for task_data in tasks:
+            ids.append(task_data.get("id") or "")
+            texts.append(task_data["text"])
+            flags.append(1 if task_data.get("completed") else 0)
+            priorities.append(strings.index(task_data.get("priority", "无")))
+            category_codes.append(strings.index(task_data.get("category", "默认")))
+            format_codes.append(strings.index(task_data.get("time_format")))
+            created_times.append(_encode_time(DataStorage._deserialize_time(task_data.get("created_time"))))
+            completed_times.append(_encode_time(DataStorage._deserialize_time(task_data.get("completed_time"))))
+
+            subtasks = task_data.get("subtasks", [])
+            subtask_counts.append(len(subtasks))
+            for subtask_data in subtasks:
+                subtask_ids.append(subtask_data.get("id") or "")
+                subtask_texts.append(subtask_data["text"])
+                subtask_flags.append(1 if subtask_data.get("completed") else 0)
+
+        out += struct.pack("<I", len(tasks))
+        out += _pack_texts(ids)
+        out += _pack_texts(texts)
+        out += flags
+        for column in (priorities, category_codes, format_codes, created_times, completed_times, subtask_counts):
+            out += column.tobytes()
+        out += struct.pack("<I", len(subtask_texts))
+        out += _pack_texts(subtask_texts)
+        out += subtask_flags
+        out += _pack_texts(subtask_ids)
+
+        body = strings.pack() + bytes(out)
+        return MAGIC + struct.pack("<I", FORMAT_VERSION) + zlib.compress(body, 6)
+
+    @staticmethod
+    def _unpack(raw):
+        """解码二进制快照为数据字典"""
+        if raw[:4] != MAGIC:
+            raise ValueError("不是有效的二进制快照文件")
+        (version,) = struct.unpack_from("<I", raw, 4)
+        if version not in (1, FORMAT_VERSION):
+            raise ValueError(f"不支持的快照版本: {version}")
+
+        reader = _Reader(zlib.decompress(raw[8:]))
+        strings = reader.texts(reader.uint())
+
+        sort_mode = strings[reader.uint()]
+        saved_at = _decode_time(reader.int64())
+
+        categories = []
+        for _ in range(reader.uint()):
+            name, icon, color = reader.uint(), reader.uint(), reader.uint()
+            categories.append({"name": strings[name], "icon": strings[icon], "color": strings[color]})
+
+        count = reader.uint()
+        ids = reader.texts(count)
+        texts = reader.texts(count)
+        flags = reader.raw(count)
+        priorities = reader.column("I", count)
+        category_codes = reader.column("I", count)
+        format_codes = reader.column("I", count)
+        created_times = reader.column("q", count)
+        completed_times = reader.column("q", count)
+        subtask_counts = reader.column("I", count)
+        subtask_total = reader.uint()
+        subtask_texts = reader.texts(subtask_total)
+        subtask_flags = reader.raw(subtask_total)
+        subtask_ids = reader.texts(subtask_total) if version >= 2 else [""] * subtask_total
+
+        tasks = []
+        position = 0
+        for i in range(count):
+            subtasks = [
+                {"id": subtask_ids[j] or None, "text": subtask_texts[j], "completed": bool(subtask_flags[j])}
+                for j in range(position, position + subtask_counts[i])
+            ]
+            position += subtask_counts[i]
+            tasks.append({
+                "id": ids[i] or None,
+                "text": texts[i],
+                "completed": bool(flags[i]),
+                "priority": strings[priorities[i]],
+                "category": strings[category_codes[i]],
+                "created_time": _decode_time(created_times[i]),
+                "completed_time": _decode_time(completed_times[i]),
+                "time_format": strings[format_codes[i]],
+                "subtasks": subtasks,
+            })
+
+        return {
+            "version": "1.0",
+            "saved_at": saved_at.isoformat() if saved_at else None,
+            "sort_mode": sort_mode,
+            "categories": categories,
+            "tasks": tasks,
+        }
+
+
+class _StringTable:
+    """字符串驻留表：重复出现的字符串只保存一次"""
+
+    def __init__(self):
+        self._codes = {}
+        self._strings = []
+
+    def index(self, value):
+        """获取字符串编号（None 保存为空字符串）"""
+        value = value or ""
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self._strings)
+            self._strings.append(value)
+        return code
+
+    def pack(self):
+        """编码字符串表"""
+        return struct.pack("<I", len(self._strings)) + _pack_texts(self._strings)
+
+
+class _Reader:
+    """顺序读取解压后的快照内容"""
+
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+
+    def uint(self):
+        (value,) = struct.unpack_from("<I", self.data, self.offset)
+        self.offset += 4
+        return value
+
+    def int64(self):
+        (value,) = struct.unpack_from("<q", self.data, self.offset)
+        self.offset += 8
+        return value
+
+    def raw(self, size):
+        value = self.data[self.offset:self.offset + size]
+        self.offset += size
+        return value
+
+    def column(self, typecode, count):
+        values = array(typecode)
+        values.frombytes(self.raw(values.itemsize * count))
+        return values
+
+    def texts(self, count):
+        lengths = self.column("I", count)
+        blob = self.raw(sum(lengths))
+        result = []
+        position = 0
+        for length in lengths:
+            result.append(blob[position:position + length].decode("utf-8"))
+            position += length
+        return result
+
+
+def _pack_texts(texts):
+    """编码字符串列：先保存每个字符串的 UTF-8 字节长度，再保存拼接后的内容"""
+    encoded = [text.encode("utf-8") for text in texts]
+    lengths = array("I", (len(item) for item in encoded))
+    return lengths.tobytes() + b"".join(encoded)
+
+
+def _encode_time(value):
+    """时间编码为自 1970-01-01 起的整数微秒（不做时区转换）"""
+    if value is None:
+        return _NO_TIME
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _decode_time(value):
+    """整数微秒解码为时间"""
+    if value == _NO_TIME:
+        return None
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def storage_for_path(file_path):
+    """根据扩展名选择快照存储（.tdb 为二进制快照，其余为 JSON）"""
+    if file_path.endswith(".tdb"):
+        return BinaryStorage(file_path)
+    return DataStorage(file_path)
+
+
+def convert(source_path, target_path):
+    """在 JSON 与二进制快照之间转换，返回转换的任务数量"""
+    data = storage_for_path(source_path).load_data()
+    if data is None:
+        raise ValueError(f"无法读取数据文件: {source_path}")
+
+    target = storage_for_path(target_path)
+    if not isinstance(target, BinaryStorage):
+        # JSON 中时间保存为 ISO 格式字符串
+        for task_data in data.get("tasks", []):
+            for key in ("created_time", "completed_time"):
+                if isinstance(task_data.get(key), datetime):
+                    task_data[key] = task_data[key].isoformat()
+
+    if not target._write_data(data):
+        raise ValueError(f"无法写入数据文件: {target_path}")
+    return len(data.get("tasks", []))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    converted = convert(sys.argv[1], sys.argv[2])
+    print(f"已转换 {converted} 个任务: {sys.argv[1]} -> {sys.argv[2]}")
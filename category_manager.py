@@ -29,6 +29,7 @@ class CategoryManager:
 
     def __init__(self):
         self.categories = []
+        self.category_map = {}  # 分类名 -> 分类
         self.current_category = None
         self.on_category_changed_callback = None
 
@@ -47,6 +48,7 @@ class CategoryManager:
 
         for category in default_categories:
             self.categories.append(category)
+            self.category_map[category.get_name()] = category
 
         # 默认选中"全部"
         self.current_category = self.categories[0]
@@ -54,28 +56,29 @@ class CategoryManager:
     def add_category(self, name, icon=None, color=None):
         """添加新分类"""
         # 检查是否已存在同名分类
-        for category in self.categories:
-            if category.get_name() == name:
-                return None
+        if name in self.category_map:
+            return None
 
         new_category = Category(name, icon, color)
         self.categories.append(new_category)
+        self.category_map[name] = new_category
         return new_category
 
     def restore_category(self, name, icon, color):
         """从数据恢复分类（用于加载保存的数据）"""
         # 检查是否已存在
-        for category in self.categories:
-            if category.get_name() == name:
-                return None
+        if name in self.category_map:
+            return None
 
         new_category = Category(name, icon, color)
         self.categories.append(new_category)
+        self.category_map[name] = new_category
         return new_category
 
     def clear_categories(self):
         """清空所有分类（用于重新加载数据）"""
         self.categories.clear()
+        self.category_map.clear()
         self.current_category = None
 
     def remove_category(self, category_name):
@@ -85,15 +88,15 @@ class CategoryManager:
         if category_name in protected_names:
             return False
 
-        for category in self.categories:
-            if category.get_name() == category_name:
-                self.categories.remove(category)
-                # 如果删除的是当前分类，切换到默认
-                if self.current_category == category:
-                    self.set_current_category("默认")
-                return True
+        category = self.category_map.pop(category_name, None)
+        if category is None:
+            return False
 
-        return False
+        self.categories.remove(category)
+        # 如果删除的是当前分类，切换到默认
+        if self.current_category == category:
+            self.set_current_category("默认")
+        return True
 
     def get_all_categories(self):
         """获取所有分类"""
@@ -105,14 +108,15 @@ class CategoryManager:
 
     def set_current_category(self, category_name):
         """设置当前分类"""
-        for category in self.categories:
-            if category.get_name() == category_name:
-                self.current_category = category
-                # 通知分类改变
-                if self.on_category_changed_callback:
-                    self.on_category_changed_callback(category)
-                return True
-        return False
+        category = self.category_map.get(category_name)
+        if category is None:
+            return False
+
+        self.current_category = category
+        # 通知分类改变
+        if self.on_category_changed_callback:
+            self.on_category_changed_callback(category)
+        return True
 
     def set_on_category_changed(self, callback):
         """设置分类改变回调"""
@@ -120,10 +124,7 @@ class CategoryManager:
 
     def get_category_by_name(self, name):
         """根据名称获取分类"""
-        for category in self.categories:
-            if category.get_name() == name:
-                return category
-        return None
+        return self.category_map.get(name)
 
     def rename_category(self, old_name, new_name, new_icon=None):
         """重命名分类（支持修改名称和图标）"""
@@ -133,7 +134,9 @@ class CategoryManager:
 
         category = self.get_category_by_name(old_name)
         if category:
+            del self.category_map[old_name]
             category.name = new_name
+            self.category_map[new_name] = category
             if new_icon:
                 category.icon = new_icon
             # 通知分类改变
@@ -6,16 +6,21 @@ import json
 import os
 from datetime import datetime
 from priority import Priority
+from atomic_io import atomic_write_json
+from task_model import TaskRecord, SubTaskRecord, DEFAULT_TIME_FORMAT
 
 
 class DataStorage:
     """数据存储管理类"""
 
-    def __init__(self, file_path="todo_data.json"):
+    STREAM_CHUNK_SIZE = 64 * 1024  # 流式加载时每次读取的字符数
+
+    def __init__(self, file_path="todo_data.json", backup_count=0):
         self.file_path = file_path
+        self.backup_count = backup_count  # 保存时保留的旧文件份数（file.bak.1 为最近一份）
 
     def save_data(self, tasks, categories, sort_mode="default"):
-        """保存所有数据到文件"""
+        """保存所有数据到文件（tasks 为 TaskRecord 列表）"""
         data = {
             "version": "1.0",
             "saved_at": datetime.now().isoformat(),
@@ -23,15 +28,37 @@ class DataStorage:
             "categories": self._serialize_categories(categories),
             "tasks": self._serialize_tasks(tasks),
         }
+        return self._write_data(data)
 
+    def _write_data(self, data):
+        """将数据字典写入文件（先写临时文件再替换，写入中途崩溃不会损坏原文件）"""
         try:
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            atomic_write_json(self.file_path, data, self.backup_count, ensure_ascii=False, indent=2)
             return True
         except Exception as e:
             print(f"保存数据失败: {e}")
             return False
 
+    def record_op(self, op, task, payload):
+        """记录单个任务操作（整份保存的存储方式无需处理，由支持日志的存储覆盖）"""
+        pass
+
+    def save_imported_tasks(self, tasks, added, categories, sort_mode="default"):
+        """保存批量导入后的数据（added 为新导入的任务，已包含在 tasks 中）
+
+        新任务和分类设置一起写入，要么全部写入，要么都不写入。整份保存的存储方式
+        直接保存全部数据，支持日志或数据库的存储只写入新任务。
+        """
+        return self.save_data(tasks, categories, sort_mode)
+
+    def supports_queries(self):
+        """是否支持按分类、状态查询（由数据库存储覆盖）"""
+        return False
+
+    def close(self):
+        """关闭存储（释放文件等资源）"""
+        pass
+
     def load_data(self):
         """从文件加载数据"""
         if not os.path.exists(self.file_path):
@@ -45,6 +72,62 @@ class DataStorage:
             print(f"加载数据失败: {e}")
             return None
 
+    def load_stream(self):
+        """流式加载数据
+
+        返回 (除任务外的数据字典, 逐个产生任务数据的迭代器)，文件不存在或无法解析时返回 None。
+        任务在迭代时才从文件中逐个解析，无需一次读入整个文件。
+        """
+        if not os.path.exists(self.file_path):
+            return None
+
+        stream = self._stream_json()
+        try:
+            header = next(stream)
+        except Exception as e:
+            stream.close()
+            print(f"加载数据失败: {e}")
+            return None
+        return header, stream
+
+    def _stream_json(self):
+        """逐块读取 JSON 文件：先产生顶层的其余字段，再逐个产生 tasks 数组中的任务
+
+        保存时 tasks 位于最后；若其后还有其他字段，它们在任务全部产生后补充进第一次产生的字典。
+        """
+        decoder = json.JSONDecoder()
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            reader = _ChunkReader(f, decoder, self.STREAM_CHUNK_SIZE)
+            header = {}
+            reader.expect("{")
+            if reader.peek() == "}":
+                yield header
+                return
+
+            header_sent = False
+            while True:
+                key = reader.value()
+                reader.expect(":")
+                if key == "tasks" and not header_sent:
+                    yield header
+                    header_sent = True
+                    reader.expect("[")
+                    if reader.peek() == "]":
+                        reader.expect("]")
+                    else:
+                        while True:
+                            yield reader.value()
+                            if reader.expect(",]") == "]":
+                                break
+                else:
+                    header[key] = reader.value()
+
+                if reader.expect(",}") == "}":
+                    break
+
+            if not header_sent:
+                yield header
+
     def _serialize_categories(self, categories):
         """序列化分类数据"""
         result = []
@@ -61,29 +144,132 @@ class DataStorage:
         result = []
         for task in tasks:
             task_data = {
-                "text": task.get_text(),
-                "completed": task.is_completed(),
-                "priority": task.get_priority().value,
-                "category": task.get_category(),
-                "created_time": task.get_created_time().isoformat() if task.get_created_time() else None,
-                "completed_time": task.get_completed_time().isoformat() if task.get_completed_time() else None,
-                "time_format": task.get_time_format(),
+                "id": task.task_id,
+                "text": task.text,
+                "completed": task.completed,
+                "priority": task.priority.value,
+                "category": task.category,
+                "created_time": self._serialize_time(task.created_time),
+                "completed_time": self._serialize_time(task.completed_time),
+                "time_format": task.time_format,
                 "subtasks": self._serialize_subtasks(task.subtasks),
             }
             result.append(task_data)
         return result
 
+    def _serialize_time(self, value):
+        """序列化时间（JSON 中使用 ISO 格式字符串）"""
+        return value.isoformat() if value else None
+
     def _serialize_subtasks(self, subtasks):
         """序列化子任务数据"""
         result = []
         for subtask in subtasks:
             result.append({
+                "id": subtask.subtask_id,
                 "text": subtask.text,
-                "completed": subtask.is_completed(),
+                "completed": subtask.completed,
             })
         return result
 
+    @staticmethod
+    def _split_data(data):
+        """将已完整加载的数据字典拆分为 load_stream 的返回形式（供不支持流式解析的存储使用）"""
+        if data is None:
+            return None
+        header = {key: value for key, value in data.items() if key != "tasks"}
+        return header, (task_data for task_data in data.get("tasks", []))
+
+    @staticmethod
+    def deserialize_task(task_data):
+        """反序列化任务数据为 TaskRecord（不构建任何UI组件）"""
+        subtasks = [
+            SubTaskRecord(subtask_data["text"], subtask_data.get("completed", False), subtask_data.get("id"))
+            for subtask_data in task_data.get("subtasks", [])
+        ]
+        return TaskRecord(
+            task_data["text"],
+            DataStorage.deserialize_priority(task_data.get("priority", "无")),
+            task_data.get("category", "默认"),
+            task_data.get("completed", False),
+            DataStorage._deserialize_time(task_data.get("created_time")),
+            DataStorage._deserialize_time(task_data.get("completed_time")),
+            task_data.get("time_format") or DEFAULT_TIME_FORMAT,
+            subtasks,
+            task_data.get("id"),
+        )
+
+    @staticmethod
+    def _deserialize_time(value):
+        """反序列化时间，格式错误时返回 None（二进制快照中已是 datetime，直接使用）"""
+        if not value:
+            return None
+        if isinstance(value, datetime):
+            return value
+        try:
+            return datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return None
+
     @staticmethod
     def deserialize_priority(priority_value):
         """反序列化优先级"""
         return Priority.from_string(priority_value)
+
+
+class _ChunkReader:
+    """按块读取文件并逐个解析 JSON 值，缓冲区中只保留尚未解析的部分"""
+
+    def __init__(self, file, decoder, chunk_size):
+        self.file = file
+        self.decoder = decoder
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        """读取下一块内容，文件已读完时返回 False"""
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """跳过空白，返回下一个字符（不消费）"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                raise ValueError("JSON 数据不完整")
+
+    def expect(self, chars):
+        """消费下一个字符，它必须是 chars 之一"""
+        char = self.peek()
+        if char not in chars:
+            raise ValueError(f"JSON 格式错误：位置 {self.pos} 处应为 {chars!r}，实际为 {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """解析下一个完整的 JSON 值"""
+        self.peek()
+        while True:
+            try:
+                result, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # 数字恰好在缓冲区末尾结束时可能还未读完整
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return result
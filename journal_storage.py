@@ -0,0 +1,274 @@
+"""
+日志式数据存储模块
+在 JSON 快照之外追加记录单个任务操作，加载时在快照上重放，日志过大时在后台压缩为新快照
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from priority import Priority
+from data_storage import DataStorage
+from task_model import new_id
+
+
+class JournalStorage(DataStorage):
+    """快照 + 追加日志的数据存储类"""
+
+    def __init__(self, file_path="todo_data.json", compact_threshold=1024 * 1024, backup_count=0):
+        super().__init__(file_path, backup_count)
+        self.journal_path = file_path + ".journal"  # 当前追加的日志
+        self.sealed_path = file_path + ".journal.1"  # 等待压缩进快照的日志
+        self.compact_threshold = compact_threshold  # 日志超过该字节数时触发后台压缩
+
+        self._lock = threading.Lock()
+        self._journal_file = None
+        self._compact_thread = None
+        self._saved_meta = None  # 最近写入的分类和排序设置，未变化时无需记录
+
+        # 统计计数
+        self.ops_written = 0
+        self.compactions = 0
+
+    def record_op(self, op, task, payload):
+        """追加一条任务操作记录（task 为 TaskRecord）"""
+        entry = {"op": op, "id": task.task_id}
+        if op == "add":
+            entry["task"] = self._serialize_tasks([task])[0]
+        else:
+            for key, value in payload.items():
+                entry[key] = self._serialize_value(value)
+        self._append(entry)
+
+    def save_imported_tasks(self, tasks, added, categories, sort_mode="default"):
+        """将新导入的任务和分类设置写成一行 import 日志记录
+
+        只占一行：写入中途崩溃时这一行不完整，加载时整体被忽略，不会只留下部分任务。
+        """
+        meta = {
+            "categories": self._serialize_categories(categories),
+            "sort_mode": sort_mode,
+        }
+        if not self._append_many([dict(meta, op="import", tasks=self._serialize_tasks(added))]):
+            return False
+        self._saved_meta = meta
+        return True
+
+    def save_data(self, tasks, categories, sort_mode="default"):
+        """保存数据：任务修改已逐条记录在日志中，这里只记录分类和排序设置的变化"""
+        meta = {
+            "categories": self._serialize_categories(categories),
+            "sort_mode": sort_mode,
+        }
+        if meta != self._saved_meta:
+            self._append(dict(meta, op="meta"))
+            self._saved_meta = meta
+
+        if self._journal_size() >= self.compact_threshold:
+            self.compact_in_background()
+        return True
+
+    def load_data(self):
+        """加载快照，并按顺序重放尚未压缩的日志"""
+        data = super().load_data()
+        journals = [path for path in (self.sealed_path, self.journal_path) if os.path.exists(path)]
+
+        if data is None:
+            if not journals:
+                return None
+            # 快照尚未生成：分类和排序设置只来自日志中的 meta 记录
+            data = {"version": "1.0", "tasks": []}
+
+        # 旧版本快照中的任务和子任务没有 id，日志无法引用它们
+        assigned = False
+        for task_data in data.get("tasks", []):
+            if not task_data.get("id"):
+                task_data["id"] = new_id()
+                assigned = True
+            for subtask_data in task_data.get("subtasks", []):
+                if not subtask_data.get("id"):
+                    subtask_data["id"] = new_id()
+                    assigned = True
+
+        for path in journals:
+            self._replay(data, self._read_journal(path))
+
+        if assigned:
+            # 立即写入带 id 的快照，已重放的日志随之作废
+            data["saved_at"] = datetime.now().isoformat()
+            if self._write_data(data):
+                for path in journals:
+                    os.remove(path)
+        return data
+
+    def load_stream(self):
+        """日志需在完整快照上重放，加载完成后再逐个产生任务"""
+        return self._split_data(self.load_data())
+
+    def compact_in_background(self):
+        """封存当前日志，并在后台线程将其合并进新快照"""
+        with self._lock:
+            if self._compact_thread and self._compact_thread.is_alive():
+                return
+            # 封存日志仍存在说明上次压缩未完成（如程序中途退出），先合并它
+            if not os.path.exists(self.sealed_path):
+                self._close_journal()
+                if not os.path.exists(self.journal_path):
+                    return
+                os.replace(self.journal_path, self.sealed_path)
+
+            self._compact_thread = threading.Thread(target=self._compact, name="JournalCompactor", daemon=True)
+            self._compact_thread.start()
+
+    def close(self):
+        """等待后台压缩完成并关闭日志文件"""
+        thread = self._compact_thread
+        if thread:
+            thread.join()
+        with self._lock:
+            self._close_journal()
+
+    def _compact(self):
+        """将封存的日志合并进快照（只读写文件，不访问内存中的任务）"""
+        try:
+            data = super().load_data()
+            if data is None:
+                if os.path.exists(self.file_path):
+                    # 快照存在但无法读取：保留封存的日志，避免只用日志中的任务覆盖快照
+                    print("压缩日志失败: 无法读取快照，保留日志")
+                    return
+                data = {"version": "1.0", "tasks": []}
+            self._replay(data, self._read_journal(self.sealed_path))
+            data["saved_at"] = datetime.now().isoformat()
+            if self._write_data(data):
+                os.remove(self.sealed_path)
+                self.compactions += 1
+        except Exception as e:
+            print(f"压缩日志失败: {e}")
+
+    def _append(self, entry):
+        """追加一行日志"""
+        self._append_many([entry])
+
+    def _append_many(self, entries):
+        """追加多行日志（一次写入），返回是否写入成功"""
+        data = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+        with self._lock:
+            try:
+                if self._journal_file is None:
+                    self._journal_file = open(self.journal_path, 'a', encoding='utf-8')
+                self._journal_file.write(data)
+                self._journal_file.flush()
+                self.ops_written += len(entries)
+                return True
+            except Exception as e:
+                print(f"写入日志失败: {e}")
+                return False
+
+    def _close_journal(self):
+        """关闭日志文件（调用方需持有锁）"""
+        if self._journal_file is not None:
+            os.fsync(self._journal_file.fileno())
+            self._journal_file.close()
+            self._journal_file = None
+
+    def _journal_size(self):
+        """当前日志大小（字节）"""
+        try:
+            return os.path.getsize(self.journal_path)
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _read_journal(path):
+        """读取日志记录，忽略末尾未写完整的行"""
+        entries = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    break
+        return entries
+
+    @staticmethod
+    def _replay(data, entries):
+        """在数据字典上按顺序重放日志记录
+
+        重放可重复进行：快照已写入、封存日志尚未删除时程序退出，下次加载会在已包含
+        这些记录的快照上再次重放，此时已存在的任务和子任务不再重复添加。
+        """
+        tasks = data.setdefault("tasks", [])
+        by_id = {task_data.get("id"): task_data for task_data in tasks}
+        deleted = set()
+
+        def add(task_data):
+            task_id = task_data.get("id")
+            if task_id in by_id and task_id not in deleted:
+                return
+            tasks.append(task_data)
+            by_id[task_id] = task_data
+            deleted.discard(task_id)
+
+        for entry in entries:
+            op = entry.get("op")
+            if op in ("meta", "import"):
+                for task_data in entry.get("tasks", []):
+                    add(task_data)
+                data["categories"] = entry["categories"]
+                data["sort_mode"] = entry["sort_mode"]
+                continue
+
+            task_id = entry.get("id")
+            if op == "add":
+                add(entry["task"])
+                continue
+
+            task_data = by_id.get(task_id)
+            if task_data is None or task_id in deleted:
+                continue
+
+            if op == "delete":
+                deleted.add(task_id)
+            elif op == "complete":
+                task_data["completed"] = entry["completed"]
+                task_data["completed_time"] = entry["completed_time"]
+            elif op == "priority":
+                task_data["priority"] = entry["priority"]
+            elif op == "category":
+                task_data["category"] = entry["category"]
+            elif op == "time":
+                task_data["created_time"] = entry["created_time"]
+                task_data["completed_time"] = entry["completed_time"]
+                task_data["time_format"] = entry["time_format"]
+            elif op == "subtask_add":
+                subtasks = task_data.setdefault("subtasks", [])
+                subtask_id = entry.get("subtask_id")
+                if subtask_id and any(subtask_data.get("id") == subtask_id for subtask_data in subtasks):
+                    continue
+                subtasks.append({
+                    "id": subtask_id,
+                    "text": entry["text"],
+                    "completed": entry["completed"],
+                })
+            elif op == "subtask_complete":
+                subtasks = task_data.get("subtasks", [])
+                if "subtask_id" in entry:
+                    for subtask_data in subtasks:
+                        if subtask_data.get("id") == entry["subtask_id"]:
+                            subtask_data["completed"] = entry["completed"]
+                            break
+                elif 0 <= entry["index"] < len(subtasks):
+                    # 旧版本日志按下标记录子任务
+                    subtasks[entry["index"]]["completed"] = entry["completed"]
+
+        if deleted:
+            data["tasks"] = [task_data for task_data in tasks if task_data.get("id") not in deleted]
+
+    @staticmethod
+    def _serialize_value(value):
+        """序列化操作记录中的字段值"""
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, Priority):
+            return value.value
+        return value
@@ -0,0 +1,73 @@
+"""
+实时搜索模块
+输入停顿后才执行搜索（防抖），搜索在后台线程中进行，被新输入取代的搜索结果直接丢弃
+"""
+import threading
+
+
+class LiveSearch:
+    """防抖的后台实时搜索"""
+
+    def __init__(self, search_func, on_results, delay=0.15):
+        self.search_func = search_func  # 执行搜索的函数：query -> 结果
+        self.on_results = on_results  # 结果回调：(query, 结果)，在后台线程中调用
+        self.delay = delay  # 防抖时间（秒）：连续输入时只搜索最后一次
+
+        self._lock = threading.Lock()
+        self._timer = None  # 等待执行的搜索
+        self._generation = 0  # 每次输入或取消时加一，用于识别过期的搜索
+        self._query = ""  # 最近一次提交的查询
+
+        # 统计计数
+        self.submitted_count = 0  # 提交的查询数
+        self.searched_count = 0  # 实际执行的搜索数
+        self.discarded_count = 0  # 执行后因已过期而丢弃的结果数
+
+    def submit(self, query, delay=None):
+        """提交查询（立即返回，停止输入 delay 秒后在后台线程中搜索）"""
+        with self._lock:
+            self.submitted_count += 1
+            self._generation += 1
+            self._query = query
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(
+                self.delay if delay is None else delay, self._run, (query, self._generation)
+            )
+            self._timer.daemon = True
+            self._timer.start()
+
+    def refresh(self):
+        """立即重新执行最近一次查询（任务数据变化时调用）"""
+        self.submit(self._query, delay=0)
+
+    def cancel(self):
+        """取消等待中和正在进行的搜索（其结果将被丢弃）"""
+        with self._lock:
+            self._generation += 1
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def get_query(self):
+        """获取最近一次提交的查询"""
+        return self._query
+
+    def _run(self, query, generation):
+        """执行搜索并回调结果（后台线程）"""
+        if generation != self._generation:
+            return
+
+        try:
+            results = self.search_func(query)
+        except Exception as e:
+            print(f"搜索失败: {e}")
+            return
+
+        with self._lock:
+            self.searched_count += 1
+            if generation != self._generation:
+                # 搜索期间已有新的输入
+                self.discarded_count += 1
+                return
+        self.on_results(query, results)
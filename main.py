@@ -2,15 +2,29 @@
 To-Do List 桌面应用
 使用 Flet 库实现的 Material Design 3 风格待办事项应用
 """
+import startup  # 最先导入：记录启动计时的起点
+import threading
 import flet as ft
-from todo_app import TodoApp
+
+startup.mark("导入 flet")
+
+# 应用模块按依赖顺序导入：数据和存储、任务管理、界面
+APP_MODULES = ("data_storage", "sqlite_storage", "journal_storage", "binary_storage", "todo_list_manager", "todo_ui", "todo_app")
+
+# 应用模块在后台线程中导入，与 Flet 客户端的启动同时进行
+_preload = threading.Thread(target=startup.import_modules, args=(APP_MODULES,), name="Preload", daemon=True)
 
 
 def main(page: ft.Page):
     """应用入口函数"""
+    startup.mark("页面连接")
+    if _preload.is_alive():
+        _preload.join()
+    from todo_app import TodoApp
     TodoApp(page)
 
 
 if __name__ == "__main__":
     # 启动 Flet 应用
+    _preload.start()
     ft.run(main)
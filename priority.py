@@ -1,8 +1,9 @@
 """
 任务优先级定义
+不在导入时依赖 Flet：颜色和图标在界面首次使用时才导入 flet，数据和存储模块可以脱离界面使用
 """
 from enum import Enum
-import flet as ft
+from functools import lru_cache
 
 
 class Priority(Enum):
@@ -15,24 +16,14 @@ class Priority(Enum):
     @staticmethod
     def get_color(priority):
         """获取优先级对应的颜色"""
-        color_map = {
-            Priority.HIGH: ft.Colors.RED_400,
-            Priority.MEDIUM: ft.Colors.ORANGE_400,
-            Priority.LOW: ft.Colors.BLUE_400,
-            Priority.NONE: ft.Colors.GREY_600,
-        }
-        return color_map.get(priority, ft.Colors.GREY_600)
+        color_map, _ = _style_maps()
+        return color_map.get(priority, color_map[Priority.NONE])
 
     @staticmethod
     def get_icon(priority):
         """获取优先级对应的图标"""
-        icon_map = {
-            Priority.HIGH: ft.Icons.FLAG,
-            Priority.MEDIUM: ft.Icons.FLAG_OUTLINED,
-            Priority.LOW: ft.Icons.FLAG_OUTLINED,
-            Priority.NONE: ft.Icons.FLAG_OUTLINED,
-        }
-        return icon_map.get(priority, ft.Icons.FLAG_OUTLINED)
+        _, icon_map = _style_maps()
+        return icon_map.get(priority, icon_map[Priority.NONE])
 
     @staticmethod
     def from_string(value):
@@ -42,7 +33,40 @@ class Priority(Enum):
                 return priority
         return Priority.NONE
 
+    @staticmethod
+    def from_name(name):
+        """从名称或别名（高/中/低/无、high/medium/low/none、h/m/l/n）转换为优先级，无法识别时返回 None"""
+        return _PRIORITY_NAMES.get(str(name).strip().lower())
+
     @staticmethod
     def get_all_values():
         """获取所有优先级值"""
         return [p.value for p in Priority]
+
+
+# 优先级名称及别名
+_PRIORITY_NAMES = {
+    "高": Priority.HIGH, "high": Priority.HIGH, "h": Priority.HIGH,
+    "中": Priority.MEDIUM, "medium": Priority.MEDIUM, "m": Priority.MEDIUM,
+    "低": Priority.LOW, "low": Priority.LOW, "l": Priority.LOW,
+    "无": Priority.NONE, "none": Priority.NONE, "n": Priority.NONE,
+}
+
+
+@lru_cache(maxsize=None)
+def _style_maps():
+    """构建优先级的颜色表和图标表（首次调用时导入 flet）"""
+    import flet as ft
+    color_map = {
+        Priority.HIGH: ft.Colors.RED_400,
+        Priority.MEDIUM: ft.Colors.ORANGE_400,
+        Priority.LOW: ft.Colors.BLUE_400,
+        Priority.NONE: ft.Colors.GREY_600,
+    }
+    icon_map = {
+        Priority.HIGH: ft.Icons.FLAG,
+        Priority.MEDIUM: ft.Icons.FLAG_OUTLINED,
+        Priority.LOW: ft.Icons.FLAG_OUTLINED,
+        Priority.NONE: ft.Icons.FLAG_OUTLINED,
+    }
+    return color_map, icon_map
@@ -0,0 +1,224 @@
+"""
+搜索索引模块
+维护任务和子任务文本的倒排索引，搜索时只检查包含查询字符的任务，无需遍历全部任务
+"""
+import threading
+from collections import OrderedDict, defaultdict
+
+
+def tokenize(text):
+    """将小写文本切分为索引词：单字和相邻两字（中文无需分词，英文也能按子串匹配）"""
+    grams = set()
+    for word in text.split():
+        grams.update(word)
+        grams.update(map(str.__add__, word, word[1:]))
+    return grams
+
+
+def _query_grams(term):
+    """查询词对应的索引词：单字查询用单字，否则用全部相邻两字"""
+    if len(term) == 1:
+        return {term}
+    return {term[i:i + 2] for i in range(len(term) - 1)}
+
+
+class SearchIndex:
+    """任务全文搜索索引
+
+    索引在首次搜索时构建，之后随任务增删和子任务添加增量更新。
+    查询按空白拆分为多个词，任务需包含全部查询词（标题或子任务中）；
+    先用索引词求交集得到候选任务，再逐个确认子串匹配并计算得分。
+    最近的查询结果会被缓存：查询以某个已缓存的查询开头时（如继续输入），
+    结果必然是其子集，只需在缓存结果中筛选；任务数据变化时清空缓存。
+    """
+
+    TITLE_SCORE = 4  # 查询词出现在标题中
+    PREFIX_SCORE = 2  # 标题以查询词开头
+    SUBTASK_SCORE = 1  # 查询词出现在子任务中
+    CACHE_SIZE = 16  # 缓存的查询结果数
+
+    def __init__(self, index):
+        self.index = index  # TaskIndex，提供全部任务和任务顺序号
+        self._built = False
+        self._docs = {}  # 任务 id -> (小写标题, 小写子任务文本, 索引词集合, 顺序号)
+        self._postings = defaultdict(set)  # 索引词 -> 包含该词的任务 id 集合
+        self._cache = OrderedDict()  # 规范化的查询 -> 排好序的 (负得分, 顺序号, 任务 id)
+        self._lock = threading.Lock()  # 搜索可能在后台线程中进行
+
+        # 统计计数
+        self.cache_hits = 0  # 直接使用缓存结果的查询数
+        self.narrowed_count = 0  # 在前缀查询结果中筛选的查询数
+
+    def add(self, tasks):
+        """任务加入索引后调用"""
+        with self._lock:
+            self._cache.clear()
+            if self._built:
+                for task in tasks:
+                    self._add(task)
+
+    def remove(self, tasks):
+        """任务从索引删除后调用"""
+        with self._lock:
+            self._cache.clear()
+            if self._built:
+                for task in tasks:
+                    self._remove(task.record.task_id)
+
+    def update(self, task):
+        """任务文本（标题或子任务）修改后调用"""
+        with self._lock:
+            self._cache.clear()
+            if self._built and task.record.task_id in self._docs:
+                self._remove(task.record.task_id)
+                self._add(task)
+
+    def clear(self):
+        """丢弃索引，下次搜索时重新构建"""
+        with self._lock:
+            self._built = False
+            self._docs.clear()
+            self._postings.clear()
+            self._cache.clear()
+
+    def search(self, query, limit=None):
+        """搜索任务，返回按得分从高到低排列的任务（得分相同时保持添加顺序）"""
+        terms = query.lower().split()
+        if not terms:
+            return []
+
+        with self._lock:
+            if not self._built:
+                self._build()
+            scored = self._search(terms)
+            if limit is not None:
+                scored = scored[:limit]
+            return [self.index.get(task_id) for _, _, task_id in scored]
+
+    def estimate(self, query):
+        """估计匹配的任务数上限（查询索引词中最小的倒排集合大小），用于选择查询计划"""
+        terms = query.lower().split()
+        if not terms:
+            return self.index.get_count()
+        with self._lock:
+            if not self._built:
+                self._build()
+            grams = set()
+            for term in terms:
+                grams |= _query_grams(term)
+            return min(len(self._postings.get(gram, ())) for gram in grams)
+
+    def rank(self, tasks, query):
+        """按与查询的相关度对任务排序（得分相同时保持添加顺序）"""
+        terms = query.lower().split()
+        with self._lock:
+            if not self._built:
+                self._build()
+            docs = self._docs
+            scored = []
+            for task in tasks:
+                doc = docs[task.record.task_id]
+                scored.append((-self._score(doc, terms), doc[3], task.record.task_id, task))
+        scored.sort(key=lambda item: item[:3])
+        return [item[3] for item in scored]
+
+    def _search(self, terms):
+        """搜索并缓存排好序的结果（私有方法）"""
+        key = " ".join(terms)
+        scored = self._cache.get(key)
+        if scored is not None:
+            self.cache_hits += 1
+            self._cache.move_to_end(key)
+            return scored
+
+        prefix = max((cached for cached in self._cache if key.startswith(cached)), key=len, default=None)
+        if prefix is not None:
+            # 前缀查询的结果包含全部可能的匹配
+            self.narrowed_count += 1
+            candidates = [task_id for _, _, task_id in self._cache[prefix]]
+        else:
+            candidates = self._candidates(terms)
+
+        docs = self._docs
+        scored = []
+        for task_id in candidates:
+            doc = docs[task_id]
+            score = self._score(doc, terms)
+            if score:
+                scored.append((-score, doc[3], task_id))
+        scored.sort()
+
+        self._cache[key] = scored
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return scored
+
+    def _build(self):
+        """为全部任务构建索引（私有方法）"""
+        for task in self.index.get_tasks():
+            self._add(task)
+        self._built = True
+
+    def _add(self, task):
+        """索引一个任务（私有方法）"""
+        record = task.record
+        title = record.text.lower()
+        grams = tokenize(title)
+        if record.subtasks:
+            subtasks = "\n".join(subtask.text for subtask in record.subtasks).lower()
+            grams |= tokenize(subtasks)
+        else:
+            subtasks = ""
+        self._docs[record.task_id] = (title, subtasks, grams, self.index.get_seq(record.task_id))
+
+        postings = self._postings
+        for gram in grams:
+            postings[gram].add(record.task_id)
+
+    def _remove(self, task_id):
+        """从索引中删除一个任务（私有方法）"""
+        doc = self._docs.pop(task_id, None)
+        if doc is None:
+            return
+        postings = self._postings
+        for gram in doc[2]:
+            task_ids = postings[gram]
+            task_ids.discard(task_id)
+            if not task_ids:
+                del postings[gram]
+
+    def _candidates(self, terms):
+        """求包含全部查询索引词的任务 id（从最小的集合开始求交集，私有方法）"""
+        grams = set()
+        for term in terms:
+            grams |= _query_grams(term)
+
+        postings = []
+        for gram in grams:
+            task_ids = self._postings.get(gram)
+            if not task_ids:
+                return set()
+            postings.append(task_ids)
+
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for task_ids in postings[1:]:
+            candidates &= task_ids
+            if not candidates:
+                break
+        return candidates
+
+    def _score(self, doc, terms):
+        """计算任务得分，有查询词未出现时返回 0（私有方法）"""
+        title, subtasks = doc[0], doc[1]
+        score = 0
+        for term in terms:
+            if term in title:
+                score += self.TITLE_SCORE
+                if title.startswith(term):
+                    score += self.PREFIX_SCORE
+            elif term in subtasks:
+                score += self.SUBTASK_SCORE
+            else:
+                return 0
+        return score
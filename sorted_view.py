@@ -0,0 +1,255 @@
+"""
+排序视图模块
+为每种排序模式维护按排序键有序的任务列表，任务增删改时用二分查找调整位置，读取时无需重新排序
+"""
+from bisect import bisect_left
+from operator import itemgetter
+from datetime import datetime, timedelta
+from priority import Priority
+
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# 优先级排序值，从高到低：高 > 中 > 低 > 无
+PRIORITY_RANK = {
+    Priority.HIGH: 0,
+    Priority.MEDIUM: 1,
+    Priority.LOW: 2,
+    Priority.NONE: 3,
+}
+
+# 优先级从低到高：无 > 低 > 中 > 高
+_PRIORITY_LOW_FIRST = {
+    Priority.NONE: 0,
+    Priority.LOW: 1,
+    Priority.MEDIUM: 2,
+    Priority.HIGH: 3,
+}
+
+
+def time_value(value):
+    """时间转换为可比较的整数（微秒）"""
+    return (value - _EPOCH) // _MICROSECOND if value else 0
+
+
+# 排序字段：key 为取值函数，ops 为会改变该字段的任务修改操作，sql 为 SQLite 存储中对应的排序表达式
+SORT_FIELDS = {
+    "status": {  # 未完成在前
+        "key": lambda record: record.completed,
+        "ops": ("complete",),
+        "sql": "completed",
+    },
+    "priority": {  # 高 > 中 > 低 > 无
+        "key": lambda record: PRIORITY_RANK.get(record.priority, 3),
+        "ops": ("priority",),
+        "sql": "priority_rank",
+    },
+    "priority_asc": {  # 无 > 低 > 中 > 高
+        "key": lambda record: _PRIORITY_LOW_FIRST.get(record.priority, 0),
+        "ops": ("priority",),
+        "sql": "priority_rank DESC",
+    },
+    "created": {  # 创建时间从旧到新
+        "key": lambda record: time_value(record.created_time),
+        "ops": ("time",),
+        "sql": "created_time",
+    },
+    "created_desc": {  # 创建时间从新到旧
+        "key": lambda record: -time_value(record.created_time),
+        "ops": ("time",),
+        "sql": "created_time DESC",
+    },
+}
+
+# 排序模式：依次比较的排序字段（全部相同时按添加顺序排列，与稳定排序结果一致）
+SORT_MODES = {
+    "priority_high": ("priority",),
+    "priority_low": ("priority_asc",),
+    "time_new": ("created_desc",),
+    "time_old": ("created",),
+    "status": ("status",),
+    "status_priority": ("status", "priority", "created_desc"),
+    "priority_time": ("priority", "created_desc"),
+    "status_time": ("status", "created_desc"),
+}
+
+_compiled_modes = {}  # 排序模式 -> (排序键函数, 会改变排序键的操作集合)
+
+
+def define_sort_mode(mode, fields):
+    """定义（或覆盖）组合排序模式，fields 为依次比较的排序字段名"""
+    for field in fields:
+        if field not in SORT_FIELDS:
+            raise ValueError(f"未知的排序字段: {field}")
+    SORT_MODES[mode] = tuple(fields)
+    _compiled_modes.pop(mode, None)
+
+
+def get_order_by(mode):
+    """获取排序模式对应的 SQL ORDER BY 表达式（不含添加顺序）"""
+    return ", ".join(SORT_FIELDS[field]["sql"] for field in SORT_MODES.get(mode, ()))
+
+
+def _compile_mode(mode):
+    """将排序模式编译为生成元组排序键的函数"""
+    compiled = _compiled_modes.get(mode)
+    if compiled is None:
+        getters = tuple(SORT_FIELDS[field]["key"] for field in SORT_MODES[mode])
+        ops = frozenset(op for field in SORT_MODES[mode] for op in SORT_FIELDS[field]["ops"])
+        if len(getters) == 1:
+            getter = getters[0]
+            key_func = lambda record: (getter(record),)
+        else:
+            key_func = lambda record: tuple(get(record) for get in getters)
+        compiled = _compiled_modes[mode] = (key_func, ops)
+    return compiled
+
+
+class SortedViews:
+    """按排序模式和分类维护的有序任务视图
+
+    视图在首次读取时整体排序构建，之后随任务增删改增量维护；
+    每个视图缓存各任务的排序键，只有排序模式涉及的字段被修改时才重新计算。
+    一次恢复大量任务时直接丢弃已有视图，下次读取时重新构建，比逐个插入更快。
+    """
+
+    BULK_THRESHOLD = 64  # 一次添加超过该数量的任务时丢弃视图
+
+    def __init__(self, index):
+        self.index = index  # TaskIndex，提供任务顺序号和分类任务
+        self._views = {}  # (排序模式, 分类名或 None) -> _SortedTasks
+
+    @staticmethod
+    def supports(mode):
+        """是否为支持的排序模式"""
+        return mode in SORT_MODES
+
+    def get_tasks(self, mode, category_name=None):
+        """获取排序后的全部任务（category_name 为 None 表示全部分类）"""
+        return self._get_view(mode, category_name).tasks()
+
+    def get_page(self, mode, category_name, start, stop):
+        """获取排序后第 [start, stop) 个任务"""
+        return self._get_view(mode, category_name).page(start, stop)
+
+    def get_range(self, mode, category_name, low=None, high=None):
+        """获取第一个排序字段取值在 [low, high) 内的任务（None 表示不限），按排序顺序排列"""
+        return self._get_view(mode, category_name).range(low, high)
+
+    def has_view(self, mode, category_name=None):
+        """视图是否已构建（未构建时首次读取需要整体排序）"""
+        return (mode, category_name) in self._views
+
+    def sort(self, mode, tasks):
+        """按排序模式对任意一组任务排序"""
+        return sorted(tasks, key=lambda task: self._key(mode, task))
+
+    def add(self, tasks):
+        """任务加入索引后调用"""
+        if not self._views:
+            return
+        if len(tasks) > self.BULK_THRESHOLD:
+            self._views.clear()
+            return
+        for task in tasks:
+            keys = {}
+            for (mode, category_name), view in self._views.items():
+                if category_name is None or category_name == task.record.category:
+                    if mode not in keys:
+                        keys[mode] = self._key(mode, task)
+                    view.add(task, keys[mode])
+
+    def remove(self, tasks):
+        """任务从索引删除后调用"""
+        if len(tasks) > self.BULK_THRESHOLD:
+            self._views.clear()
+            return
+        for task in tasks:
+            for view in self._views.values():
+                view.remove(task)
+
+    def update(self, task, op):
+        """任务被修改后调用：只有修改涉及排序字段或分类时才移动该任务"""
+        keys = {}
+        for (mode, category_name), view in self._views.items():
+            if category_name is not None and category_name != task.record.category:
+                view.remove(task)
+                continue
+            if op not in _compile_mode(mode)[1] and view.contains(task):
+                # 缓存的排序键仍然有效
+                continue
+            if mode not in keys:
+                keys[mode] = self._key(mode, task)
+            view.update(task, keys[mode])
+
+    def clear(self):
+        """丢弃全部视图"""
+        self._views.clear()
+
+    def _get_view(self, mode, category_name):
+        """获取视图，不存在时排序构建（私有方法）"""
+        view = self._views.get((mode, category_name))
+        if view is None:
+            key_func = _compile_mode(mode)[0]
+            items = [(key_func(task.record) + seq, task) for seq, task in self.index.get_items(category_name)]
+            view = _SortedTasks(items)
+            self._views[(mode, category_name)] = view
+        return view
+
+    def _key(self, mode, task):
+        """排序键：排序字段 + 顺序号（私有方法）"""
+        return _compile_mode(mode)[0](task.record) + self.index.get_seq(task.record.task_id)
+
+
+class _SortedTasks:
+    """按排序键有序的任务列表（排序键与任务分别存放在两个平行列表中）"""
+
+    __slots__ = ("keys", "items", "key_of")
+
+    def __init__(self, items):
+        items.sort(key=itemgetter(0))
+        self.keys = [key for key, _ in items]  # 有序的排序键
+        self.items = [task for _, task in items]  # 与排序键一一对应的任务
+        self.key_of = {task.record.task_id: key for key, task in items}  # 任务 id -> 排序键
+
+    def add(self, task, key):
+        """插入任务"""
+        position = bisect_left(self.keys, key)
+        self.keys.insert(position, key)
+        self.items.insert(position, task)
+        self.key_of[task.record.task_id] = key
+
+    def remove(self, task):
+        """删除任务（不在视图中时忽略）"""
+        key = self.key_of.pop(task.record.task_id, None)
+        if key is None:
+            return
+        position = bisect_left(self.keys, key)
+        del self.keys[position]
+        del self.items[position]
+
+    def contains(self, task):
+        """任务是否在视图中"""
+        return task.record.task_id in self.key_of
+
+    def update(self, task, key):
+        """排序键变化时移动任务，任务不在视图中时插入"""
+        if self.key_of.get(task.record.task_id) == key:
+            return
+        self.remove(task)
+        self.add(task, key)
+
+    def tasks(self):
+        """按顺序获取全部任务"""
+        return list(self.items)
+
+    def page(self, start, stop):
+        """按顺序获取第 [start, stop) 个任务"""
+        return self.items[start:stop]
+
+    def range(self, low, high):
+        """获取排序键第一项在 [low, high) 内的任务（None 表示不限）"""
+        start = 0 if low is None else bisect_left(self.keys, (low,))
+        stop = len(self.keys) if high is None else bisect_left(self.keys, (high,))
+        return self.items[start:stop]
@@ -0,0 +1,278 @@
+"""
+SQLite 数据存储模块
+按任务逐行保存，支持单个任务的增删改，并用索引支持按分类、状态、优先级和时间查询
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from priority import Priority
+from data_storage import DataStorage
+from sorted_view import get_order_by
+
+
+class SQLiteStorage(DataStorage):
+    """SQLite 数据存储类"""
+
+    # 优先级排序值：高 > 中 > 低 > 无
+    PRIORITY_RANK = {
+        Priority.HIGH: 0,
+        Priority.MEDIUM: 1,
+        Priority.LOW: 2,
+        Priority.NONE: 3,
+    }
+
+    def __init__(self, file_path="todo_data.db"):
+        super().__init__(file_path)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(file_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._synced = False  # 数据库中的任务是否与内存一致
+        self._create_schema()
+
+    def _create_schema(self):
+        """创建数据表和索引"""
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    id TEXT PRIMARY KEY,
+                    seq INTEGER NOT NULL,
+                    text TEXT NOT NULL,
+                    completed INTEGER NOT NULL DEFAULT 0,
+                    priority TEXT NOT NULL,
+                    priority_rank INTEGER NOT NULL,
+                    category TEXT NOT NULL,
+                    created_time TEXT,
+                    completed_time TEXT,
+                    time_format TEXT,
+                    subtasks TEXT NOT NULL DEFAULT '[]'
+                );
+                CREATE INDEX IF NOT EXISTS idx_tasks_seq ON tasks(seq);
+                CREATE INDEX IF NOT EXISTS idx_tasks_category ON tasks(category, seq);
+                CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks(completed, seq);
+                CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks(priority_rank, seq);
+                CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks(created_time);
+
+                CREATE TABLE IF NOT EXISTS categories (
+                    position INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    icon TEXT,
+                    color TEXT
+                );
+
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+            """)
+
+    def save_data(self, tasks, categories, sort_mode="default"):
+        """保存数据
+
+        任务修改已通过 record_op 逐条同步，数据库与内存一致后只需保存分类和排序设置；
+        首次保存（如新建的数据库）时整体同步全部任务。
+        """
+        try:
+            with self._lock, self._conn:
+                if not self._synced:
+                    self._sync_tasks(tasks)
+                    self._synced = True
+                self._save_meta(categories, sort_mode)
+            return True
+        except Exception as e:
+            print(f"保存数据失败: {e}")
+            return False
+
+    def load_data(self):
+        """加载数据，返回与 JSON 文件相同结构的字典"""
+        try:
+            with self._lock:
+                meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+                if not meta:
+                    return None
+                categories = [
+                    {"name": name, "icon": icon, "color": color}
+                    for name, icon, color in self._conn.execute(
+                        "SELECT name, icon, color FROM categories ORDER BY position")
+                ]
+                rows = self._conn.execute(
+                    "SELECT id, text, completed, priority, category, created_time, completed_time,"
+                    " time_format, subtasks FROM tasks ORDER BY seq").fetchall()
+        except Exception as e:
+            print(f"加载数据失败: {e}")
+            return None
+
+        # 内存中的任务将由这些数据恢复，之后的修改由 record_op 逐条同步
+        self._synced = True
+        tasks = [
+            {
+                "id": task_id,
+                "text": text,
+                "completed": bool(completed),
+                "priority": priority,
+                "category": category,
+                "created_time": created_time,
+                "completed_time": completed_time,
+                "time_format": time_format,
+                "subtasks": json.loads(subtasks),
+            }
+            for task_id, text, completed, priority, category, created_time, completed_time, time_format, subtasks in rows
+        ]
+        return {
+            "version": meta.get("version", "1.0"),
+            "saved_at": meta.get("saved_at"),
+            "sort_mode": meta.get("sort_mode", "default"),
+            "categories": categories,
+            "tasks": tasks,
+        }
+
+    def load_stream(self):
+        """从数据库一次查询全部任务后逐个产生"""
+        return self._split_data(self.load_data())
+
+    def record_op(self, op, task, payload):
+        """单个任务修改后立即同步到数据库"""
+        if op == "delete":
+            self.delete_task(task.task_id)
+        else:
+            self.upsert_task(task)
+
+    def save_imported_tasks(self, tasks, added, categories, sort_mode="default"):
+        """在一个事务中插入新导入的任务并保存分类和排序设置"""
+        try:
+            with self._lock, self._conn:
+                if self._synced:
+                    self._upsert_many(added)
+                else:
+                    self._sync_tasks(tasks)
+                    self._synced = True
+                self._save_meta(categories, sort_mode)
+            return True
+        except Exception as e:
+            print(f"保存数据失败: {e}")
+            return False
+
+    def upsert_task(self, task):
+        """插入或更新单个任务（task 为 TaskRecord）"""
+        with self._lock, self._conn:
+            self._upsert(task)
+
+    def delete_task(self, task_id):
+        """删除单个任务"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    def supports_queries(self):
+        """是否支持索引查询"""
+        return True
+
+    def query_task_ids(self, category=None, completed=None, sort_mode="default", start=0, stop=None):
+        """按分类和完成状态查询任务 id，并按排序模式排序
+
+        只返回排序后第 [start, stop) 个（stop 为 None 表示到末尾），分页由数据库的 LIMIT/OFFSET 完成。
+        """
+        where, params = self._build_where(category, completed)
+        sql = "SELECT id FROM tasks" + where + " ORDER BY " + self._order_by(sort_mode)
+        if start or stop is not None:
+            # LIMIT -1 表示不限数量
+            limit = -1 if stop is None else max(0, stop - start)
+            sql += " LIMIT ? OFFSET ?"
+            params = list(params) + [limit, start]
+        with self._lock:
+            return [row[0] for row in self._conn.execute(sql, params)]
+
+    def count_tasks(self, category=None, completed=None):
+        """统计任务数量"""
+        where, params = self._build_where(category, completed)
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tasks" + where, params).fetchone()[0]
+
+    @staticmethod
+    def _order_by(sort_mode):
+        """排序模式对应的 ORDER BY 表达式（由排序视图中的排序字段定义生成，最后按添加顺序）"""
+        order_by = get_order_by(sort_mode)
+        return order_by + ", seq" if order_by else "seq"
+
+    @staticmethod
+    def _build_where(category, completed):
+        """构建查询条件（None 表示不限）"""
+        conditions = []
+        params = []
+        if category is not None:
+            conditions.append("category = ?")
+            params.append(category)
+        if completed is not None:
+            conditions.append("completed = ?")
+            params.append(1 if completed else 0)
+        if not conditions:
+            return "", params
+        return " WHERE " + " AND ".join(conditions), params
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+    def _sync_tasks(self, tasks):
+        """整体同步任务：更新全部任务并删除已不存在的任务（调用方需持有锁并处于事务中）"""
+        self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS keep_ids (id TEXT PRIMARY KEY)")
+        self._conn.execute("DELETE FROM keep_ids")
+        self._upsert_many(tasks)
+        self._conn.executemany("INSERT OR IGNORE INTO keep_ids VALUES (?)", [(task.task_id,) for task in tasks])
+        self._conn.execute("DELETE FROM tasks WHERE id NOT IN (SELECT id FROM keep_ids)")
+
+    def _upsert(self, task):
+        """插入或更新任务行（调用方需持有锁）；已存在的任务保留原来的顺序号"""
+        self._upsert_many([task])
+
+    def _upsert_many(self, tasks):
+        """批量插入或更新任务行（调用方需持有锁）"""
+        self._conn.executemany(
+            """
+            INSERT INTO tasks (id, seq, text, completed, priority, priority_rank, category,
+                               created_time, completed_time, time_format, subtasks)
+            VALUES (?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM tasks), ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                text = excluded.text,
+                completed = excluded.completed,
+                priority = excluded.priority,
+                priority_rank = excluded.priority_rank,
+                category = excluded.category,
+                created_time = excluded.created_time,
+                completed_time = excluded.completed_time,
+                time_format = excluded.time_format,
+                subtasks = excluded.subtasks
+            """,
+            [(
+                task.task_id,
+                task.text,
+                1 if task.completed else 0,
+                task.priority.value,
+                self.PRIORITY_RANK.get(task.priority, 3),
+                task.category,
+                task.created_time.isoformat() if task.created_time else None,
+                task.completed_time.isoformat() if task.completed_time else None,
+                task.time_format,
+                json.dumps(self._serialize_subtasks(task.subtasks), ensure_ascii=False),
+            ) for task in tasks],
+        )
+
+    def _save_meta(self, categories, sort_mode):
+        """保存分类和排序设置（调用方需持有锁并处于事务中）"""
+        self._conn.execute("DELETE FROM categories")
+        self._conn.executemany(
+            "INSERT INTO categories (position, name, icon, color) VALUES (?, ?, ?, ?)",
+            [
+                (position, category["name"], category["icon"], category["color"])
+                for position, category in enumerate(self._serialize_categories(categories))
+            ],
+        )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [
+                ("version", "1.0"),
+                ("saved_at", datetime.now().isoformat()),
+                ("sort_mode", sort_mode),
+            ],
+        )
@@ -0,0 +1,80 @@
+"""
+启动计时模块
+记录从进程启动到首屏任务列表显示的各阶段耗时。设置环境变量 TODO_STARTUP_REPORT=1 后启动应用，
+首屏显示后打印报告；单个模块的导入耗时可用 python -X importtime main.py 查看
+"""
+import importlib
+import os
+import time
+
+
+_IMPORTED = time.perf_counter()  # 本模块的导入时刻（main.py 开始执行）
+ENABLED = bool(os.environ.get("TODO_STARTUP_REPORT"))  # 是否打印启动报告
+
+_marks = []  # (阶段名称, 完成时刻)
+_reported = False
+
+
+def _process_start():
+    """估算进程启动时刻（perf_counter 时间）
+
+    Linux 上由 /proc 中的进程启动时间和系统运行时间推算（精度约 10 毫秒），
+    其他平台使用本模块的导入时刻，此时不包括解释器启动的耗时。
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        elapsed = uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+        return _IMPORTED - max(0.0, elapsed)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return _IMPORTED
+
+
+_START = _process_start()
+_marks.append(("解释器启动", _IMPORTED))
+
+
+def mark(name):
+    """记录一个阶段完成"""
+    _marks.append((name, time.perf_counter()))
+
+
+def import_modules(names):
+    """按顺序导入模块并分别记录耗时（已被前面的模块导入的依赖不再计入）"""
+    for name in names:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"预加载模块失败: {e}")
+            return
+        mark(f"导入 {name}")
+
+
+def get_marks():
+    """获取各阶段的 (名称, 距进程启动的毫秒数, 本阶段毫秒数)"""
+    result = []
+    previous = _START
+    for name, moment in sorted(_marks, key=lambda item: item[1]):
+        result.append((name, (moment - _START) * 1000, (moment - previous) * 1000))
+        previous = moment
+    return result
+
+
+def report():
+    """打印启动报告（只在启用时打印一次）"""
+    global _reported
+    if not ENABLED or _reported:
+        return
+    _reported = True
+    lines = ["启动耗时（从进程启动起，毫秒）:"]
+    for name, total, step in get_marks():
+        lines.append(f"  {_pad(name, 28)} {total:>9.1f}  (+{step:.1f})")
+    print("\n".join(lines))
+
+
+def _pad(text, width):
+    """按显示宽度补齐空格（中文字符占两列）"""
+    display_width = sum(2 if ord(char) > 0x2E80 else 1 for char in text)
+    return text + " " * max(0, width - display_width)
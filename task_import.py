@@ -0,0 +1,336 @@
+"""
+任务批量导入模块
+逐行读取 CSV 或 JSON Lines 文件，按列映射生成任务，全部读取后与新分类一起一次写入数据文件
+
+用法（导入时请先关闭应用）:
+    python task_import.py tasks.csv todo_data.json
+    python task_import.py tasks.jsonl todo_data.json --map text=标题 --map category=项目 --category 工作
+
+CSV 的第一行为列名；JSON Lines 每行一个对象。默认按常见列名识别各字段，
+也可用 --map 字段=列名 指定（字段：text, priority, category, completed, subtasks, created_time, completed_time）。
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from binary_storage import BinaryStorage
+from category_manager import Category, CategoryManager
+from data_storage import DataStorage
+from journal_storage import JournalStorage
+from priority import Priority
+from sqlite_storage import SQLiteStorage
+from task_model import TaskRecord, SubTaskRecord
+
+
+# 字段 -> 默认识别的列名（不区分大小写）
+DEFAULT_COLUMNS = {
+    "text": ("text", "title", "task", "name", "content", "标题", "任务", "内容"),
+    "priority": ("priority", "pri", "优先级"),
+    "category": ("category", "cat", "list", "project", "分类", "清单", "项目"),
+    "completed": ("completed", "done", "status", "完成", "状态"),
+    "subtasks": ("subtasks", "checklist", "子任务"),
+    "created_time": ("created_time", "created", "created_at", "创建时间"),
+    "completed_time": ("completed_time", "completed_at", "done_at", "完成时间"),
+}
+
+_TRUE_VALUES = {"1", "true", "yes", "y", "x", "done", "completed", "是", "已完成"}
+_TIME_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d", "%Y/%m/%d %H:%M", "%Y/%m/%d")
+
+
+class ImportReport:
+    """导入结果统计"""
+
+    MAX_ERRORS = 10  # 最多保留的错误信息条数
+
+    def __init__(self):
+        self.imported = 0  # 导入的任务数
+        self.skipped = 0  # 跳过的行数
+        self.errors = []  # (行号, 错误信息)
+        self.new_categories = []  # 导入时新建的分类
+        self.elapsed = 0.0  # 耗时（秒）
+
+    def add_error(self, line_number, message):
+        """记录跳过的行"""
+        self.skipped += 1
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append((line_number, message))
+
+    def get_rate(self):
+        """获取导入速度（行/秒）"""
+        rows = self.imported + self.skipped
+        return rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    def format(self):
+        """格式化为可读的报告"""
+        lines = [
+            f"已导入 {self.imported} 个任务，跳过 {self.skipped} 行，"
+            f"耗时 {self.elapsed:.2f} 秒（{self.get_rate():.0f} 行/秒）"
+        ]
+        if self.new_categories:
+            lines.append(f"新建分类: {', '.join(self.new_categories)}")
+        for line_number, message in self.errors:
+            lines.append(f"  第 {line_number} 行: {message}")
+        if self.skipped > len(self.errors):
+            lines.append(f"  …另有 {self.skipped - len(self.errors)} 行错误")
+        return "\n".join(lines)
+
+
+def read_rows(file_path):
+    """逐行读取 CSV 或 JSON Lines 文件，产生 (行号, 行)
+
+    CSV 的行为字典；JSON Lines 的行为未解析的文本，由 parse_line 解析，
+    以便单行格式错误时只跳过该行。
+    """
+    if file_path.endswith((".jsonl", ".ndjson")):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    yield line_number, line
+    else:
+        # utf-8-sig 兼容带 BOM 的 CSV（如 Excel 导出的文件）
+        with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+            for line_number, row in enumerate(csv.DictReader(f), 2):
+                yield line_number, row
+
+
+def parse_line(line):
+    """解析 JSON Lines 中的一行，不是合法的 JSON 对象时抛出 ValueError"""
+    try:
+        row = json.loads(line)
+    except ValueError as e:
+        raise ValueError(f"无效的 JSON: {e}")
+    if not isinstance(row, dict):
+        raise ValueError("该行不是 JSON 对象")
+    return row
+
+
+def resolve_columns(field_names, mapping=None):
+    """根据列名确定各字段对应的列：mapping 中指定的优先，其余按默认列名识别
+
+    找不到任务内容所在的列或 mapping 中有未知字段时抛出 ValueError。
+    """
+    # CSV 中多出的字段以 None 为列名（DictReader 的 restkey），不作为列
+    lookup = {name.strip().lower(): name for name in field_names if isinstance(name, str)}
+    columns = {}
+    for field, aliases in DEFAULT_COLUMNS.items():
+        for alias in aliases:
+            if alias in lookup:
+                columns[field] = lookup[alias]
+                break
+    for field, column in (mapping or {}).items():
+        if field not in DEFAULT_COLUMNS:
+            raise ValueError(f"未知的字段: {field}")
+        columns[field] = column
+    if "text" not in columns:
+        raise ValueError("找不到任务内容所在的列，请用 --map text=列名 指定")
+    return columns
+
+
+def parse_row(row, columns, default_category="默认"):
+    """将一行数据转换为 TaskRecord，数据不合法时抛出 ValueError"""
+    text = _value(row, columns, "text")
+    if not text or not str(text).strip():
+        raise ValueError("任务内容为空")
+
+    priority = Priority.NONE
+    priority_value = _value(row, columns, "priority")
+    if priority_value not in (None, ""):
+        priority = Priority.from_name(priority_value)
+        if priority is None:
+            raise ValueError(f"无法识别的优先级: {priority_value}")
+
+    completed = _parse_bool(_value(row, columns, "completed"))
+    created_time = _parse_time(_value(row, columns, "created_time"))
+    completed_time = _parse_time(_value(row, columns, "completed_time")) if completed else None
+    category = _value(row, columns, "category")
+
+    return TaskRecord(
+        str(text).strip(),
+        priority=priority,
+        category=str(category).strip() if category else default_category,
+        completed=completed,
+        created_time=created_time,
+        completed_time=completed_time,
+        subtasks=_parse_subtasks(_value(row, columns, "subtasks")),
+    )
+
+
+def iter_records(file_path, mapping=None, default_category="默认", report=None):
+    """逐行读取文件并产生 TaskRecord，不合法的行记入 report 后跳过
+
+    各行按自己的键确定列（JSON Lines 中各行的键可能不同），相同键的行共用一份列映射。
+    """
+    for field in mapping or {}:
+        if field not in DEFAULT_COLUMNS:
+            raise ValueError(f"未知的字段: {field}")
+
+    columns_by_keys = {}
+    for line_number, row in read_rows(file_path):
+        try:
+            if isinstance(row, str):
+                row = parse_line(row)
+            keys = tuple(row)
+            columns = columns_by_keys.get(keys)
+            if columns is None:
+                columns = columns_by_keys[keys] = resolve_columns(keys, mapping)
+            record = parse_row(row, columns, default_category)
+        except (ValueError, TypeError) as e:
+            if report is not None:
+                report.add_error(line_number, str(e))
+            continue
+        yield record
+
+
+def open_storage(file_path):
+    """按数据文件类型打开存储（与应用使用相同的存储方式）"""
+    if file_path.endswith((".db", ".sqlite")):
+        return SQLiteStorage(file_path)
+    if file_path.endswith(".tdb"):
+        return BinaryStorage(file_path)
+    if os.path.exists(file_path + ".journal"):
+        return JournalStorage(file_path)
+    return DataStorage(file_path)
+
+
+def import_file(source_path, target_path, mapping=None, default_category="默认"):
+    """将 CSV / JSON Lines 文件中的任务追加到数据文件，返回 ImportReport
+
+    先读取整个文件（不合法的行跳过），再将新任务和文件中出现的新分类一次写入存储
+    （日志和数据库存储只写入新任务）：导入中途出错时数据文件保持不变。
+    """
+    report = ImportReport()
+    start = time.perf_counter()
+    storage = open_storage(target_path)
+    try:
+        data = storage.load_data() or {}
+        tasks = [DataStorage.deserialize_task(task_data) for task_data in data.get("tasks", [])]
+        categories = _load_categories(data)
+        known = {category.get_name() for category in categories}
+
+        added = list(iter_records(source_path, mapping, default_category, report))
+        report.imported = len(added)
+        for record in added:
+            if record.category not in known:
+                known.add(record.category)
+                categories.append(Category(record.category))
+                report.new_categories.append(record.category)
+
+        tasks.extend(added)
+        if added and not storage.save_imported_tasks(tasks, added, categories, data.get("sort_mode", "default")):
+            raise ValueError(f"无法写入数据文件: {target_path}")
+    finally:
+        storage.close()
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def _load_categories(data):
+    """从数据中恢复分类，没有保存分类时使用默认分类"""
+    if "categories" not in data:
+        return list(CategoryManager().get_all_categories())
+    return [
+        Category(cat_data["name"], cat_data["icon"], cat_data.get("color"))
+        for cat_data in data["categories"]
+    ]
+
+
+def _value(row, columns, field):
+    """获取字段对应列的值（列不存在时为 None）"""
+    column = columns.get(field)
+    return row.get(column) if column is not None else None
+
+
+def _parse_bool(value):
+    """解析完成状态"""
+    if isinstance(value, bool):
+        return value
+    return value is not None and str(value).strip().lower() in _TRUE_VALUES
+
+
+def _parse_time(value):
+    """解析时间：ISO 格式、常见日期格式或 Unix 时间戳（秒），为空时返回 None"""
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return _from_timestamp(value)
+    value = str(value).strip()
+    try:
+        return _to_local(datetime.fromisoformat(value))
+    except ValueError:
+        pass
+    for time_format in _TIME_FORMATS:
+        try:
+            return datetime.strptime(value, time_format)
+        except ValueError:
+            pass
+    return _from_timestamp(value)
+
+
+def _from_timestamp(value):
+    """将 Unix 时间戳（秒）转换为本地时间，超出范围时抛出 ValueError"""
+    try:
+        return datetime.fromtimestamp(float(value))
+    except (ValueError, OverflowError, OSError):
+        raise ValueError(f"无法识别的时间: {value}")
+
+
+def _to_local(value):
+    """带时区的时间转换为本地时间并去掉时区（应用中的时间均为不带时区的本地时间）"""
+    if value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def _parse_subtasks(value):
+    """解析子任务：列表（字符串或 {text, completed}）、JSON 数组字符串，或用 | 分隔的文本"""
+    if value in (None, ""):
+        return []
+    if isinstance(value, str):
+        value = value.strip()
+        if value.startswith("["):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                raise ValueError(f"无法解析子任务: {value}")
+        else:
+            value = value.split("|")
+
+    subtasks = []
+    for item in value:
+        if isinstance(item, dict):
+            text, completed = item.get("text"), _parse_bool(item.get("completed"))
+        else:
+            text, completed = item, False
+        if text and str(text).strip():
+            subtasks.append(SubTaskRecord(str(text).strip(), completed))
+    return subtasks
+
+
+def _parse_mapping(items):
+    """解析命令行中的 字段=列名"""
+    mapping = {}
+    for item in items:
+        field, sep, column = item.partition("=")
+        if not sep:
+            raise ValueError(f"列映射格式应为 字段=列名: {item}")
+        mapping[field.strip()] = column.strip()
+    return mapping
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="从 CSV / JSON Lines 文件批量导入任务")
+    parser.add_argument("source", help="要导入的 .csv 或 .jsonl 文件")
+    parser.add_argument("target", nargs="?", default="todo_data.json", help="数据文件（默认 todo_data.json）")
+    parser.add_argument("--map", action="append", default=[], metavar="字段=列名", help="指定字段对应的列")
+    parser.add_argument("--category", default="默认", help="没有分类列时使用的分类")
+    args = parser.parse_args()
+
+    try:
+        result = import_file(args.source, args.target, _parse_mapping(args.map), args.category)
+    except (OSError, ValueError) as e:
+        print(f"导入失败: {e}")
+        sys.exit(1)
+    print(result.format())
@@ -0,0 +1,168 @@
+"""
+任务索引模块
+维护 id -> 任务的映射，以及全部任务和每个分类下任务的有序集合，查找、删除和移动分类无需遍历任务列表
+"""
+from bisect import bisect_left, insort
+
+
+class TaskIndex:
+    """任务索引类
+
+    每个任务有一个顺序号，全部任务及各分类中的任务都按顺序号排列（即默认排序）。
+    从数据恢复的任务顺序号为 (0, n)，本次运行中新添加的任务为 (1, n)，
+    因此后台加载期间新添加的任务始终排在已保存的任务之后。
+    """
+
+    def __init__(self):
+        self.task_map = {}  # 任务 id -> 任务
+        self._entries = {}  # 任务 id -> (顺序号, 所在分类的集合)
+        self._all = _OrderedTasks(None)  # 全部任务
+        self._categories = {}  # 分类名 -> 该分类的任务集合
+        self._restored_seq = 0
+        self._added_seq = 0
+
+    def add(self, task, restored=False):
+        """添加任务到索引（restored 表示从数据恢复的任务）"""
+        if restored:
+            seq = (0, self._restored_seq)
+            self._restored_seq += 1
+        else:
+            seq = (1, self._added_seq)
+            self._added_seq += 1
+
+        bucket = self._get_bucket(task.record.category)
+        self._all.add(seq, task)
+        bucket.add(seq, task)
+        self.task_map[task.record.task_id] = task
+        self._entries[task.record.task_id] = (seq, bucket)
+
+    def remove(self, task):
+        """从索引中删除任务，任务不在索引中时返回 False"""
+        task_id = task.record.task_id
+        entry = self._entries.pop(task_id, None)
+        if entry is None:
+            return False
+        seq, bucket = entry
+        del self.task_map[task_id]
+        self._all.remove(seq)
+        self._remove_from_bucket(bucket, seq)
+        return True
+
+    def move(self, task):
+        """任务分类修改后，将其移动到新分类的集合中"""
+        entry = self._entries.get(task.record.task_id)
+        if entry is None:
+            return
+        seq, bucket = entry
+        if bucket.name == task.record.category:
+            return
+        self._remove_from_bucket(bucket, seq)
+        new_bucket = self._get_bucket(task.record.category)
+        new_bucket.add(seq, task)
+        self._entries[task.record.task_id] = (seq, new_bucket)
+
+    def rename_category(self, old_name, new_name):
+        """将某个分类下的全部任务改挂到新分类名下（新分类已有任务时合并）"""
+        if old_name == new_name or old_name not in self._categories:
+            return
+
+        bucket = self._categories.pop(old_name)
+        target = self._categories.get(new_name)
+        if target is None:
+            # 新分类下没有任务：直接改名，无需逐个移动
+            bucket.name = new_name
+            self._categories[new_name] = bucket
+            return
+
+        for seq, task in bucket.items():
+            target.add(seq, task)
+            self._entries[task.record.task_id] = (seq, target)
+
+    def contains(self, task_id):
+        """任务是否在索引中"""
+        return task_id in self.task_map
+
+    def get(self, task_id):
+        """根据 id 获取任务"""
+        return self.task_map.get(task_id)
+
+    def get_seq(self, task_id):
+        """获取任务的顺序号"""
+        return self._entries[task_id][0]
+
+    def get_count(self):
+        """获取任务总数"""
+        return len(self._all)
+
+    def get_tasks(self):
+        """按顺序获取全部任务"""
+        return self._all.tasks()
+
+    def get_category_tasks(self, category_name):
+        """按顺序获取某个分类的任务"""
+        bucket = self._categories.get(category_name)
+        return bucket.tasks() if bucket else []
+
+    def get_items(self, category_name=None):
+        """按顺序获取 (顺序号, 任务)（category_name 为 None 表示全部分类）"""
+        bucket = self._all if category_name is None else self._categories.get(category_name)
+        return bucket.items() if bucket else []
+
+    def get_page(self, category_name, start, stop):
+        """按顺序获取第 [start, stop) 个任务（category_name 为 None 表示全部分类）"""
+        bucket = self._all if category_name is None else self._categories.get(category_name)
+        return bucket.page(start, stop) if bucket else []
+
+    def _get_bucket(self, category_name):
+        """获取分类的任务集合，不存在时创建（私有方法）"""
+        bucket = self._categories.get(category_name)
+        if bucket is None:
+            bucket = self._categories[category_name] = _OrderedTasks(category_name)
+        return bucket
+
+    def _remove_from_bucket(self, bucket, seq):
+        """从分类集合中删除任务，集合为空时删除该分类（私有方法）"""
+        bucket.remove(seq)
+        if not bucket and self._categories.get(bucket.name) is bucket:
+            del self._categories[bucket.name]
+
+
+class _OrderedTasks:
+    """按顺序号排列的任务集合"""
+
+    __slots__ = ("name", "seqs", "by_seq")
+
+    def __init__(self, name):
+        self.name = name  # 所属分类名（全部任务的集合为 None）
+        self.seqs = []  # 有序的顺序号
+        self.by_seq = {}  # 顺序号 -> 任务
+
+    def __len__(self):
+        return len(self.seqs)
+
+    def add(self, seq, task):
+        """添加任务（顺序号最大时直接追加）"""
+        if not self.seqs or seq > self.seqs[-1]:
+            self.seqs.append(seq)
+        else:
+            insort(self.seqs, seq)
+        self.by_seq[seq] = task
+
+    def remove(self, seq):
+        """删除任务"""
+        del self.by_seq[seq]
+        del self.seqs[bisect_left(self.seqs, seq)]
+
+    def items(self):
+        """按顺序获取 (顺序号, 任务)"""
+        return [(seq, self.by_seq[seq]) for seq in self.seqs]
+
+    def tasks(self):
+        """按顺序获取任务"""
+        by_seq = self.by_seq
+        return [by_seq[seq] for seq in self.seqs]
+
+    def page(self, start, stop):
+        """按顺序获取第 [start, stop) 个任务"""
+        by_seq = self.by_seq
+        return [by_seq[seq] for seq in self.seqs[start:stop]]
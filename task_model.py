@@ -0,0 +1,59 @@
+"""
+任务数据模型
+只保存需要持久化的任务数据，不依赖 Flet；UI 组件由 TodoItem 在显示时按需构建
+"""
+import uuid
+from datetime import datetime
+from priority import Priority
+
+
+DEFAULT_TIME_FORMAT = "MM-DD HH:MM"
+
+
+def new_id():
+    """生成新的唯一标识"""
+    return uuid.uuid4().hex
+
+
+class SubTaskRecord:
+    """子任务数据"""
+
+    __slots__ = ("subtask_id", "text", "completed")
+
+    def __init__(self, text, completed=False, subtask_id=None):
+        self.subtask_id = subtask_id or new_id()  # 持久化的唯一标识
+        self.text = text
+        self.completed = completed
+
+
+class TaskRecord:
+    """任务数据"""
+
+    __slots__ = (
+        "task_id", "text", "completed", "priority", "category",
+        "created_time", "completed_time", "time_format", "subtasks",
+    )
+
+    def __init__(self, text, priority=Priority.NONE, category="默认", completed=False,
+                 created_time=None, completed_time=None, time_format=DEFAULT_TIME_FORMAT, subtasks=None,
+                 task_id=None):
+        self.task_id = task_id or new_id()  # 持久化的唯一标识
+        self.text = text
+        self.completed = completed
+        self.priority = priority
+        self.category = category
+        self.created_time = created_time or datetime.now()
+        self.completed_time = completed_time
+        self.time_format = time_format
+        self.subtasks = subtasks if subtasks is not None else []
+
+    def get_subtask(self, subtask_id):
+        """根据 id 获取子任务数据"""
+        for subtask in self.subtasks:
+            if subtask.subtask_id == subtask_id:
+                return subtask
+        return None
+
+    def get_completed_subtasks_count(self):
+        """获取已完成的子任务数量"""
+        return sum(1 for subtask in self.subtasks if subtask.completed)
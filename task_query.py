@@ -0,0 +1,307 @@
+"""
+任务查询模块
+解析查询语句（如 cat:工作 pri:高 done:no created:>2026-01-01 报告），
+查询计划先用选择性最高的索引取得候选任务，再用其余条件逐个筛选
+"""
+import shlex
+from datetime import datetime, timedelta
+from priority import Priority
+from sorted_view import PRIORITY_RANK, time_value
+
+
+# 条件名（支持别名）-> 条件类型
+_FILTER_KEYS = {
+    "cat": "category", "category": "category", "分类": "category",
+    "pri": "priority", "priority": "priority", "优先级": "priority",
+    "done": "done", "status": "done", "状态": "done",
+    "created": "created", "创建": "created",
+}
+
+_DONE_NAMES = {
+    "yes": True, "y": True, "true": True, "1": True, "是": True, "已完成": True,
+    "no": False, "n": False, "false": False, "0": False, "否": False, "未完成": False,
+}
+
+
+class TaskQuery:
+    """解析后的查询：结构化条件 + 文本查询词（全部条件同时满足）"""
+
+    def __init__(self, filters, terms):
+        self.filters = filters  # 结构化条件列表
+        self.terms = terms  # 文本查询词（在标题和子任务中匹配）
+
+    def is_empty(self):
+        """是否没有任何条件"""
+        return not self.filters and not self.terms
+
+    def is_text_only(self):
+        """是否只有文本查询词"""
+        return not self.filters and bool(self.terms)
+
+    def get_text(self):
+        """获取文本查询部分"""
+        return " ".join(self.terms)
+
+    def get_conditions(self):
+        """获取全部条件（文本查询词作为一个条件，数据源为搜索索引）"""
+        if self.terms:
+            return self.filters + [_TextFilter(self.get_text())]
+        return list(self.filters)
+
+
+def parse_query(text):
+    """解析查询语句
+
+    形如 key:value 且条件名可识别、取值合法的词作为结构化条件，其余的词作为文本查询词，
+    因此输入到一半的条件（如 "pri:"）不会报错，只是暂时按文本匹配。
+    """
+    try:
+        tokens = shlex.split(text)
+    except ValueError:
+        # 引号不成对时按空白切分
+        tokens = text.split()
+
+    filters = []
+    terms = []
+    for token in tokens:
+        key, sep, value = token.partition(":")
+        query_filter = None
+        if sep and value:
+            kind = _FILTER_KEYS.get(key.lower())
+            if kind is not None:
+                query_filter = _parse_filter(kind, value)
+        if query_filter is not None:
+            filters.append(query_filter)
+        else:
+            terms.append(token)
+    return TaskQuery(filters, terms)
+
+
+def plan_query(query, manager):
+    """选择取得候选任务的方式
+
+    返回 (作为数据源的条件, 其余条件)：数据源为 None 时遍历全部任务；
+    其余条件按估计的匹配数从少到多排列，筛选时最先排除最多的任务。
+    """
+    estimates = [(condition.estimate(manager), index, condition) for index, condition in enumerate(query.get_conditions())]
+    source, best_cost = None, manager.index.get_count()
+    for estimate, _, condition in estimates:
+        cost = condition.source_cost(manager, estimate)
+        if cost is not None and cost < best_cost:
+            source, best_cost = condition, cost
+    predicates = [condition for _, _, condition in sorted(estimates, key=lambda item: item[:2]) if condition is not source]
+    return source, predicates
+
+
+def run_query(query, manager):
+    """执行查询，有文本查询词时按相关度排列，否则按当前排序模式排列"""
+    if query.is_empty():
+        return []
+
+    source, predicates = plan_query(query, manager)
+    if source is not None:
+        tasks, order = source.fetch(manager)
+    else:
+        tasks, order = manager.index.get_tasks(), "default"
+
+    if predicates:
+        tasks = [task for task in tasks if all(predicate.matches(task.record) for predicate in predicates)]
+
+    if query.terms:
+        return tasks if order == "text" else manager.search_index.rank(tasks, query.get_text())
+    sort_mode = manager.get_sort_mode()
+    if order == sort_mode:
+        return tasks
+    if manager.views.supports(sort_mode):
+        return manager.views.sort(sort_mode, tasks)
+    return sorted(tasks, key=lambda task: manager.index.get_seq(task.record.task_id))
+
+
+def _parse_filter(kind, value):
+    """解析单个条件，取值不合法时返回 None"""
+    if kind == "category":
+        return _CategoryFilter(value)
+    if kind == "priority":
+        priorities = [Priority.from_name(name) for name in value.split(",")]
+        return None if None in priorities else _PriorityFilter(priorities)
+    if kind == "done":
+        completed = _DONE_NAMES.get(value.lower())
+        return None if completed is None else _DoneFilter(completed)
+    if kind == "created":
+        day_range = _parse_day_range(value)
+        return None if day_range is None else _CreatedFilter(*day_range)
+    return None
+
+
+def _parse_day(value):
+    """解析日期（YYYY-MM-DD、today/今天、yesterday/昨天），不合法时返回 None"""
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    if value in ("today", "今天"):
+        return today
+    if value in ("yesterday", "昨天"):
+        return today - timedelta(days=1)
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def _parse_day_range(value):
+    """解析日期范围为 [开始, 结束)（None 表示不限），不合法时返回 None
+
+    支持 >D、>=D、<D、<=D、D（当天）和 D1..D2（含两端）。
+    """
+    one_day = timedelta(days=1)
+    if ".." in value:
+        start, _, end = value.partition("..")
+        start_day, end_day = _parse_day(start), _parse_day(end)
+        if start_day is None or end_day is None:
+            return None
+        return start_day, end_day + one_day
+
+    for operator in (">=", "<=", ">", "<"):
+        if value.startswith(operator):
+            day = _parse_day(value[len(operator):])
+            if day is None:
+                return None
+            if operator == ">=":
+                return day, None
+            if operator == ">":
+                return day + one_day, None
+            if operator == "<=":
+                return None, day + one_day
+            return None, day
+
+    day = _parse_day(value)
+    return None if day is None else (day, day + one_day)
+
+
+class _CategoryFilter:
+    """分类条件（多个分类用逗号分隔）：数据源为分类索引"""
+
+    def __init__(self, value):
+        self.categories = value.split(",")
+
+    def estimate(self, manager):
+        return sum(manager.stats.get_category_counts(name)[0] for name in self.categories)
+
+    def source_cost(self, manager, estimate):
+        return estimate if len(self.categories) == 1 else None
+
+    def fetch(self, manager):
+        return manager.index.get_category_tasks(self.categories[0]), "default"
+
+    def matches(self, record):
+        return record.category in self.categories
+
+
+class _PriorityFilter:
+    """优先级条件：优先级相邻时数据源为优先级排序视图中的一段"""
+
+    MODE = "priority_high"
+
+    def __init__(self, priorities):
+        self.priorities = set(priorities)
+        ranks = sorted(PRIORITY_RANK[priority] for priority in self.priorities)
+        # 排序视图中只有相邻的优先级才是连续的一段
+        self.rank_range = (ranks[0], ranks[-1] + 1) if ranks[-1] - ranks[0] + 1 == len(ranks) else None
+
+    def estimate(self, manager):
+        return sum(manager.stats.get_priority_count(priority) for priority in self.priorities)
+
+    def source_cost(self, manager, estimate):
+        if self.rank_range is None:
+            return None
+        return _view_cost(manager, self.MODE, estimate)
+
+    def fetch(self, manager):
+        return manager.views.get_range(self.MODE, None, *self.rank_range), self.MODE
+
+    def matches(self, record):
+        return record.priority in self.priorities
+
+
+class _DoneFilter:
+    """完成状态条件：数据源为完成状态排序视图中的一段"""
+
+    MODE = "status"
+
+    def __init__(self, completed):
+        self.completed = completed
+
+    def estimate(self, manager):
+        stats = manager.stats
+        return stats.get_completed() if self.completed else stats.get_pending()
+
+    def source_cost(self, manager, estimate):
+        return _view_cost(manager, self.MODE, estimate)
+
+    def fetch(self, manager):
+        value = int(self.completed)
+        return manager.views.get_range(self.MODE, None, value, value + 1), self.MODE
+
+    def matches(self, record):
+        return record.completed == self.completed
+
+
+class _CreatedFilter:
+    """创建时间条件 [start, end)：数据源为创建时间排序视图中的一段"""
+
+    MODE = "time_old"
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+
+    def estimate(self, manager):
+        return manager.stats.get_created_count_between(
+            self.start.date() if self.start else None,
+            self.end.date() if self.end else None,
+        )
+
+    def source_cost(self, manager, estimate):
+        return _view_cost(manager, self.MODE, estimate)
+
+    def fetch(self, manager):
+        low = time_value(self.start) if self.start else None
+        high = time_value(self.end) if self.end else None
+        return manager.views.get_range(self.MODE, None, low, high), self.MODE
+
+    def matches(self, record):
+        created = record.created_time
+        return (self.start is None or created >= self.start) and (self.end is None or created < self.end)
+
+
+class _TextFilter:
+    """文本条件：每个查询词都出现在标题或子任务中，数据源为搜索索引"""
+
+    def __init__(self, text):
+        self.text = text
+        self.terms = text.lower().split()
+
+    def estimate(self, manager):
+        return manager.search_index.estimate(self.text)
+
+    def source_cost(self, manager, estimate):
+        return estimate
+
+    def fetch(self, manager):
+        return manager.search_index.search(self.text), "text"
+
+    def matches(self, record):
+        title = record.text.lower()
+        for term in self.terms:
+            if term not in title and not any(term in subtask.text.lower() for subtask in record.subtasks):
+                return False
+        return True
+
+
+def _view_cost(manager, mode, estimate):
+    """从排序视图取一段任务的代价
+
+    视图未构建时需先排序全部任务，但构建后会随任务修改增量维护，之后的查询都能直接使用，
+    因此只计入一半的构建代价：选择性高的条件会构建视图，匹配大部分任务的条件仍遍历全部任务。
+    """
+    if manager.views.has_view(mode):
+        return estimate
+    return estimate + manager.index.get_count() // 2
@@ -0,0 +1,132 @@
+"""
+任务统计模块
+在任务增加、删除和修改时增量更新统计数据，查询时无需遍历任务列表
+"""
+from collections import Counter
+
+
+class TaskStats:
+    """任务统计类"""
+
+    def __init__(self):
+        self.total = 0
+        self.completed = 0
+        self.subtask_total = 0
+        self.subtask_completed = 0
+        self.category_counts = {}  # 分类名 -> [任务数, 已完成数]
+        self.priority_counts = Counter()  # 优先级 -> 任务数
+        self.created_by_day = Counter()  # 创建日期 -> 任务数
+        self.completed_by_day = Counter()  # 完成日期 -> 任务数
+        self._counted = {}  # 任务 id -> 计入时的统计快照，用于修改或删除时扣除旧值
+
+    def add(self, record):
+        """计入一个任务（record 为 TaskRecord）"""
+        snapshot = self._snapshot(record)
+        self._apply(snapshot, 1)
+        self._counted[record.task_id] = snapshot
+
+    def remove(self, record):
+        """按计入时的状态扣除一个任务"""
+        snapshot = self._counted.pop(record.task_id, None)
+        if snapshot is not None:
+            self._apply(snapshot, -1)
+
+    def update(self, record):
+        """任务数据修改后更新统计"""
+        if record.task_id in self._counted:
+            self.remove(record)
+            self.add(record)
+
+    def get_total(self):
+        """获取任务总数"""
+        return self.total
+
+    def get_completed(self):
+        """获取已完成任务数"""
+        return self.completed
+
+    def get_pending(self):
+        """获取未完成任务数"""
+        return self.total - self.completed
+
+    def get_completion_rate(self, category_name=None):
+        """获取完成率（百分比），category_name 为 None 时统计全部任务"""
+        if category_name is None:
+            total, completed = self.total, self.completed
+        else:
+            total, completed = self.get_category_counts(category_name)
+        return completed / total * 100 if total else 0.0
+
+    def get_category_counts(self, category_name):
+        """获取分类的 (任务数, 已完成数)"""
+        counts = self.category_counts.get(category_name)
+        return (counts[0], counts[1]) if counts else (0, 0)
+
+    def get_priority_count(self, priority):
+        """获取某个优先级的任务数"""
+        return self.priority_counts[priority]
+
+    def get_subtask_counts(self):
+        """获取子任务的 (总数, 已完成数)"""
+        return self.subtask_total, self.subtask_completed
+
+    def get_created_count(self, day):
+        """获取某天（date）创建的任务数"""
+        return self.created_by_day[day]
+
+    def get_created_count_between(self, start_day=None, end_day=None):
+        """获取创建日期在 [start_day, end_day) 内的任务数（None 表示不限）"""
+        return sum(
+            count for day, count in self.created_by_day.items()
+            if (start_day is None or day >= start_day) and (end_day is None or day < end_day)
+        )
+
+    def get_completed_count(self, day):
+        """获取某天（date）完成的任务数"""
+        return self.completed_by_day[day]
+
+    def get_daily_completed(self):
+        """获取每天完成的任务数 {date: 数量}，按日期排序"""
+        return dict(sorted(self.completed_by_day.items()))
+
+    @staticmethod
+    def _snapshot(record):
+        """记录统计所需的任务字段"""
+        return (
+            record.category,
+            record.completed,
+            record.priority,
+            record.created_time.date() if record.created_time else None,
+            record.completed_time.date() if record.completed and record.completed_time else None,
+            len(record.subtasks),
+            record.get_completed_subtasks_count(),
+        )
+
+    def _apply(self, snapshot, delta):
+        """将统计快照计入（delta=1）或扣除（delta=-1）"""
+        category, completed, priority, created_day, completed_day, subtask_total, subtask_completed = snapshot
+
+        self.total += delta
+        self.subtask_total += delta * subtask_total
+        self.subtask_completed += delta * subtask_completed
+
+        counts = self.category_counts.setdefault(category, [0, 0])
+        counts[0] += delta
+        if completed:
+            self.completed += delta
+            counts[1] += delta
+        if counts[0] == 0:
+            del self.category_counts[category]
+
+        self._change(self.priority_counts, priority, delta)
+        if created_day is not None:
+            self._change(self.created_by_day, created_day, delta)
+        if completed_day is not None:
+            self._change(self.completed_by_day, completed_day, delta)
+
+    @staticmethod
+    def _change(counter, key, delta):
+        """修改计数，归零时删除该键"""
+        counter[key] += delta
+        if counter[key] == 0:
+            del counter[key]
@@ -1,10 +1,95 @@
 """
 主题管理模块
 用于管理应用的深色和浅色主题
+
+theme_config.json 中可定义自己的主题，并分别指定深色和浅色模式使用的主题：
+    {
+        "is_dark_mode": true,
+        "dark_theme": "午夜",
+        "themes": {
+            "午夜": {"base": "dark", "primary": "#7C4DFF", "card": "#101018"}
+        }
+    }
+未指定的颜色沿用 base（dark / light）对应的内置主题，可用的颜色名见 COLOR_ROLES。
 """
 import flet as ft
 import json
 from pathlib import Path
+from atomic_io import atomic_write_json
+
+
+# 界面颜色角色 -> (配色方案槽位, 深色主题颜色, 浅色主题颜色)
+# 控件只引用槽位对应的颜色令牌，切换主题时由页面主题重新解析，无需逐个修改控件；
+# 没有对应语义的角色借用 Material 组件默认不使用的槽位（tertiary、surface_dim）
+COLOR_ROLES = {
+    "primary": ("primary", ft.Colors.INDIGO_400, ft.Colors.INDIGO_500),
+    "secondary": ("secondary", ft.Colors.INDIGO_300, ft.Colors.INDIGO_700),
+    "background": ("surface_container_lowest", ft.Colors.GREY_900, "#FAFAFA"),
+    "card": ("surface_container_low", "#1E1E1E", ft.Colors.WHITE),
+    "input_bg": ("surface_container_high", ft.Colors.GREY_800, ft.Colors.WHITE),
+    "item_bg": ("surface_container_highest", ft.Colors.GREY_800, "#F5F5F5"),
+    "surface": ("surface", ft.Colors.GREY_900, ft.Colors.WHITE),
+    "primary_container": ("primary_container", ft.Colors.INDIGO_700, ft.Colors.INDIGO_50),
+    "text": ("on_surface", ft.Colors.WHITE, "#212121"),
+    "secondary_text": ("on_surface_variant", ft.Colors.GREY_400, "#757575"),
+    "icon": ("on_tertiary", ft.Colors.GREY_400, "#757575"),
+    "hint": ("outline", ft.Colors.GREY_500, "#9E9E9E"),
+    "border": ("outline_variant", ft.Colors.GREY_700, "#E0E0E0"),
+    "divider": ("surface_dim", ft.Colors.GREY_700, "#EEEEEE"),
+    "chip_bg": ("secondary_container", ft.Colors.with_opacity(0.2, ft.Colors.INDIGO_400), "#E8EAF6"),
+    "chip_text": ("on_secondary_container", ft.Colors.INDIGO_200, "#3F51B5"),
+    "completed_text": ("tertiary", ft.Colors.GREY_500, "#BDBDBD"),
+    "subtitle": ("on_tertiary_container", ft.Colors.WHITE70, "#616161"),
+    "shadow": ("shadow", ft.Colors.with_opacity(0.3, ft.Colors.BLACK), ft.Colors.with_opacity(0.08, ft.Colors.BLACK)),
+}
+
+
+class Palette:
+    """不可变的调色板：各颜色角色的颜色（属性访问），以及据此构建的页面主题"""
+
+    __slots__ = ("name", "is_dark", "theme") + tuple(COLOR_ROLES)
+
+    def __init__(self, name, is_dark, colors, theme=None):
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "is_dark", is_dark)
+        object.__setattr__(self, "theme", theme)
+        for role in COLOR_ROLES:
+            object.__setattr__(self, role, colors[role])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("调色板不可修改")
+
+    def get_color(self, role):
+        """按角色名获取颜色"""
+        return getattr(self, role)
+
+    def to_dict(self):
+        """导出为 角色 -> 颜色 的字典"""
+        return {role: getattr(self, role) for role in COLOR_ROLES}
+
+
+def build_palette(name, is_dark, overrides=None):
+    """在内置深色/浅色配色的基础上应用自定义颜色，构建调色板（同时构建页面主题）"""
+    colors = {role: roles[1] if is_dark else roles[2] for role, roles in COLOR_ROLES.items()}
+    for role, color in (overrides or {}).items():
+        if role in COLOR_ROLES:
+            colors[role] = color
+        else:
+            print(f"主题 {name} 中的未知颜色: {role}")
+
+    scheme = {"on_primary": ft.Colors.WHITE}
+    for role, color in colors.items():
+        scheme[COLOR_ROLES[role][0]] = color
+    theme = ft.Theme(color_scheme=ft.ColorScheme(**scheme), use_material3=True)
+    return Palette(name, is_dark, colors, theme)
+
+
+# 内置主题
+DARK_PALETTE = build_palette("dark", True)
+LIGHT_PALETTE = build_palette("light", False)
+
+# 控件使用的颜色令牌（如 "onsurface"）：与主题无关，实际颜色由页面当前主题解析
+TOKENS = Palette("tokens", None, {role: ft.Colors(roles[0].replace("_", "")) for role, roles in COLOR_ROLES.items()})
 
 
 class ThemeManager:
@@ -14,29 +99,55 @@ class ThemeManager:
         self.page = page
         self.is_dark_mode = True  # 默认深色模式
         self.on_theme_changed_callback = None
+        self.colors = TOKENS  # 控件取色使用的共享调色板（颜色令牌）
 
         # 主题配置文件路径
         self.config_file = Path("theme_config.json")
+        self._config = {}  # 配置文件内容（保存时保留自定义主题等其他设置）
+
+        # 深色和浅色模式使用的调色板（加载时构建一次，切换主题时只切换引用）
+        self.dark_palette = DARK_PALETTE
+        self.light_palette = LIGHT_PALETTE
+        self.palette = DARK_PALETTE  # 当前调色板
 
         # 加载保存的主题设置
         self._load_theme_preference()
 
     def _load_theme_preference(self):
-        """加载保存的主题偏好"""
+        """加载保存的主题偏好和自定义主题"""
         try:
             if self.config_file.exists():
                 with open(self.config_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
+                    self._config = data
                     self.is_dark_mode = data.get('is_dark_mode', True)
+                    themes = data.get('themes', {})
+                    self.dark_palette = self._load_palette(themes, data.get('dark_theme'), True)
+                    self.light_palette = self._load_palette(themes, data.get('light_theme'), False)
         except Exception as e:
             print(f"加载主题配置失败: {e}")
             self.is_dark_mode = True
+        self.palette = self.dark_palette if self.is_dark_mode else self.light_palette
+
+    @staticmethod
+    def _load_palette(themes, name, is_dark):
+        """构建配置中指定的自定义主题，未指定或无效时使用内置主题"""
+        default = DARK_PALETTE if is_dark else LIGHT_PALETTE
+        if not name:
+            return default
+        theme = themes.get(name)
+        if not isinstance(theme, dict):
+            print(f"找不到主题: {name}")
+            return default
+        overrides = dict(theme)
+        base = overrides.pop("base", "dark" if is_dark else "light")
+        return build_palette(name, base == "dark", overrides)
 
     def _save_theme_preference(self):
         """保存主题偏好"""
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump({'is_dark_mode': self.is_dark_mode}, f)
+            self._config['is_dark_mode'] = self.is_dark_mode
+            atomic_write_json(self.config_file, self._config)
         except Exception as e:
             print(f"保存主题配置失败: {e}")
 
@@ -46,52 +157,30 @@ class ThemeManager:
 
     def get_theme_config(self):
         """获取当前主题配置"""
-        if self.is_dark_mode:
-            return self._get_dark_theme()
-        else:
-            return self._get_light_theme()
-
-    def _get_dark_theme(self):
-        """深色主题配置"""
-        return ft.Theme(
-            color_scheme=ft.ColorScheme(
-                primary=ft.Colors.INDIGO_400,
-                on_primary=ft.Colors.WHITE,
-                primary_container=ft.Colors.INDIGO_700,
-                secondary=ft.Colors.INDIGO_300,
-                surface=ft.Colors.GREY_900,
-            ),
-            use_material3=True,
-        )
-
-    def _get_light_theme(self):
-        """浅色主题配置 - 优化配色方案"""
-        return ft.Theme(
-            color_scheme=ft.ColorScheme(
-                primary=ft.Colors.INDIGO_500,           # 主色调：靛蓝色
-                on_primary=ft.Colors.WHITE,              # 主色调上的文字
-                primary_container=ft.Colors.INDIGO_50,   # 主色调容器
-                secondary=ft.Colors.INDIGO_700,          # 次要色
-                surface=ft.Colors.WHITE,                 # 表面颜色
-            ),
-            use_material3=True,
-        )
+        return self.palette.theme
+
+    def get_palette(self):
+        """获取当前调色板（实际颜色）"""
+        return self.palette
 
     def toggle_theme(self):
-        """切换主题"""
+        """切换主题（页面同时配置了两套配色，只需切换主题模式）"""
         self.is_dark_mode = not self.is_dark_mode
+        self.palette = self.dark_palette if self.is_dark_mode else self.light_palette
         self._save_theme_preference()
-        self._apply_theme()
+        self.page.theme_mode = self.get_current_theme_mode()
 
-        # 触发回调通知主题已改变
+        # 触发回调通知主题已改变（回调中的界面修改随下面的页面更新一起发送）
         if self.on_theme_changed_callback:
             self.on_theme_changed_callback(self.is_dark_mode)
+        self.page.update()
 
     def _apply_theme(self):
-        """应用主题到页面"""
+        """应用主题到页面：浅色和深色配色同时设置，由主题模式决定使用哪一套"""
         self.page.theme_mode = self.get_current_theme_mode()
-        self.page.theme = self.get_theme_config()
-        self.page.bgcolor = ft.Colors.GREY_900 if self.is_dark_mode else ft.Colors.GREY_50
+        self.page.theme = self.light_palette.theme
+        self.page.dark_theme = self.dark_palette.theme
+        self.page.bgcolor = self.colors.background
         self.page.update()
 
     def apply_initial_theme(self):
@@ -106,74 +195,71 @@ class ThemeManager:
         """是否为深色模式"""
         return self.is_dark_mode
 
-    # 主题颜色获取方法 - 根据当前主题返回不同颜色
+    # 主题颜色获取方法 - 返回配色方案中的颜色令牌，实际颜色随页面主题模式变化
     def get_primary_color(self):
         """获取主色调"""
-        return ft.Colors.INDIGO_400 if self.is_dark_mode else ft.Colors.INDIGO_500
+        return self.colors.primary
 
     def get_secondary_color(self):
         """获取次要颜色"""
-        return ft.Colors.INDIGO_300 if self.is_dark_mode else ft.Colors.INDIGO_700
+        return self.colors.secondary
 
     def get_background_color(self):
         """获取背景颜色"""
-        return ft.Colors.GREY_900 if self.is_dark_mode else "#FAFAFA"
+        return self.colors.background
 
     def get_card_color(self):
         """获取卡片背景颜色"""
-        return "#1E1E1E" if self.is_dark_mode else ft.Colors.WHITE
+        return self.colors.card
 
     def get_item_bg_color(self):
         """获取列表项背景颜色"""
-        return ft.Colors.GREY_800 if self.is_dark_mode else "#F5F5F5"
+        return self.colors.item_bg
 
     def get_text_color(self):
         """获取主文本颜色"""
-        return ft.Colors.WHITE if self.is_dark_mode else "#212121"
+        return self.colors.text
 
     def get_secondary_text_color(self):
         """获取次要文本颜色"""
-        return ft.Colors.GREY_400 if self.is_dark_mode else "#757575"
+        return self.colors.secondary_text
 
     def get_hint_color(self):
         """获取提示文本颜色"""
-        return ft.Colors.GREY_500 if self.is_dark_mode else "#9E9E9E"
+        return self.colors.hint
 
     def get_border_color(self):
         """获取边框颜色"""
-        return ft.Colors.GREY_700 if self.is_dark_mode else "#E0E0E0"
+        return self.colors.border
 
     def get_divider_color(self):
         """获取分割线颜色"""
-        return ft.Colors.GREY_700 if self.is_dark_mode else "#EEEEEE"
+        return self.colors.divider
 
     def get_input_bg_color(self):
         """获取输入框背景颜色"""
-        return ft.Colors.GREY_800 if self.is_dark_mode else ft.Colors.WHITE
+        return self.colors.input_bg
 
     def get_chip_bg_color(self):
         """获取标签背景颜色"""
-        return ft.Colors.with_opacity(0.2, ft.Colors.INDIGO_400) if self.is_dark_mode else "#E8EAF6"
+        return self.colors.chip_bg
 
     def get_chip_text_color(self):
         """获取标签文本颜色"""
-        return ft.Colors.INDIGO_200 if self.is_dark_mode else "#3F51B5"
+        return self.colors.chip_text
 
     def get_completed_text_color(self):
         """获取已完成任务文本颜色"""
-        return ft.Colors.GREY_500 if self.is_dark_mode else "#BDBDBD"
+        return self.colors.completed_text
 
     def get_subtitle_color(self):
         """获取副标题颜色"""
-        return ft.Colors.WHITE70 if self.is_dark_mode else "#616161"
+        return self.colors.subtitle
 
     def get_icon_color(self):
         """获取图标颜色"""
-        return ft.Colors.GREY_400 if self.is_dark_mode else "#757575"
+        return self.colors.icon
 
     def get_shadow_color(self):
         """获取阴影颜色"""
-        if self.is_dark_mode:
-            return ft.Colors.with_opacity(0.3, ft.Colors.BLACK)
-        else:
-            return ft.Colors.with_opacity(0.08, ft.Colors.BLACK)
+        return self.colors.shadow
@@ -0,0 +1,163 @@
+"""
+时间格式模块
+所有任务共享的时间显示格式注册表：每种格式在注册时确定一次 strftime 模式，
+格式化结果按 (时间, 格式) 缓存；支持自定义格式和相对时间（"3 小时前"），
+相对时间由一个定时器统一刷新，而不是每个任务各自计时
+
+time_formats.json 中可定义自己的时间格式（名称 -> strftime 模式），启动时注册：
+    {"月日": "%m月%d日 %H:%M", "周": "%a %H:%M"}
+"""
+import json
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from task_model import DEFAULT_TIME_FORMAT
+
+
+LABEL_CACHE_SIZE = 4096  # 每种格式缓存的格式化结果数
+TICK_INTERVAL = 30  # 相对时间的刷新间隔（秒）
+RELATIVE_TIME_FORMAT = "相对时间"
+
+
+class TimeFormat:
+    """一种时间显示格式，格式化结果按时间缓存"""
+
+    is_relative = False  # 显示内容是否随当前时间变化
+
+    def __init__(self, name, pattern):
+        self.name = name  # 格式名称（保存在任务数据中）
+        self.pattern = pattern  # strftime 模式
+        self._cache = lru_cache(maxsize=LABEL_CACHE_SIZE)(self._format)
+
+    def format(self, value):
+        """格式化时间"""
+        return self._cache(value)
+
+    def _format(self, value):
+        return value.strftime(self.pattern)
+
+
+class RelativeTimeFormat(TimeFormat):
+    """相对时间格式（刚刚、5 分钟前、3 小时前、2 天前），超过一周显示日期
+
+    结果按 (时间, 当前分钟) 缓存：同一分钟内重复格式化直接返回，进入下一分钟后自动重新计算。
+    """
+
+    is_relative = True
+
+    def __init__(self, name, pattern="%Y-%m-%d"):
+        super().__init__(name, pattern)
+
+    def format(self, value):
+        """格式化时间（相对于当前时间）"""
+        return self._cache(value, int(time.time() // 60))
+
+    def _format(self, value, minute):
+        seconds = (datetime.now() - value).total_seconds()
+        if seconds < 60:
+            # 包括稍晚于当前时间的时间（如刚修改的时间）
+            return "刚刚"
+        if seconds < 3600:
+            return f"{int(seconds // 60)} 分钟前"
+        if seconds < 86400:
+            return f"{int(seconds // 3600)} 小时前"
+        if seconds < 7 * 86400:
+            return f"{int(seconds // 86400)} 天前"
+        return value.strftime(self.pattern)
+
+
+# 格式名称 -> 时间格式（按注册顺序，即时间格式选项的顺序）
+_time_formats = {}
+
+
+def define_time_format(name, pattern):
+    """注册自定义时间格式（pattern 为 strftime 模式，如 "%m月%d日 %H:%M"），同名格式会被替换"""
+    if not name or not pattern:
+        raise ValueError("时间格式的名称和模式不能为空")
+    try:
+        datetime.now().strftime(pattern)
+    except ValueError as e:
+        raise ValueError(f"无效的时间格式 {pattern}: {e}")
+    _time_formats[name] = TimeFormat(name, pattern)
+
+
+def load_time_formats(file_path):
+    """从配置文件注册自定义时间格式，返回注册成功的格式名称（文件不存在时不注册）"""
+    path = Path(file_path)
+    if not path.exists():
+        return []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            formats = json.load(f)
+        if not isinstance(formats, dict):
+            raise ValueError("配置应为 名称 -> 时间格式 的对象")
+    except Exception as e:
+        print(f"加载时间格式配置失败: {e}")
+        return []
+
+    names = []
+    for name, pattern in formats.items():
+        try:
+            define_time_format(name, pattern)
+            names.append(name)
+        except (ValueError, TypeError) as e:
+            print(f"注册时间格式失败: {e}")
+    return names
+
+
+def get_time_format(name):
+    """获取时间格式，未注册的格式（如已删除的自定义格式）使用默认格式"""
+    time_format = _time_formats.get(name)
+    if time_format is None:
+        time_format = _time_formats[DEFAULT_TIME_FORMAT]
+    return time_format
+
+
+def get_time_format_names():
+    """获取所有时间格式名称"""
+    return list(_time_formats)
+
+
+def format_time(value, name):
+    """按指定格式格式化时间"""
+    return get_time_format(name).format(value)
+
+
+# 内置格式
+define_time_format("MM-DD HH:MM", "%m-%d %H:%M")
+define_time_format("YYYY-MM-DD HH:MM", "%Y-%m-%d %H:%M")
+define_time_format("MM/DD HH:MM", "%m/%d %H:%M")
+define_time_format("HH:MM MM-DD", "%H:%M %m-%d")
+define_time_format("YYYY年MM月DD日 HH:MM", "%Y年%m月%d日 %H:%M")
+_time_formats[RELATIVE_TIME_FORMAT] = RelativeTimeFormat(RELATIVE_TIME_FORMAT)
+
+
+class TimeTicker:
+    """定时回调（一个后台线程），用于统一刷新相对时间的显示"""
+
+    def __init__(self, callback, interval=TICK_INTERVAL):
+        self.callback = callback
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """启动定时器（已启动时忽略）"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="TimeTicker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止定时器"""
+        self._stopped.set()
+
+    def _run(self):
+        """每隔 interval 秒调用一次回调（后台线程）"""
+        while not self._stopped.wait(self.interval):
+            try:
+                self.callback()
+            except Exception as e:
+                print(f"刷新时间显示失败: {e}")
@@ -1,19 +1,47 @@
+import threading
+import time
+from itertools import islice
 import flet as ft
 from todo_list_manager import TodoListManager
 from todo_ui import TodoUI
 from category_manager import CategoryManager
 from data_storage import DataStorage
+from journal_storage import JournalStorage
+from sqlite_storage import SQLiteStorage
+from binary_storage import BinaryStorage
 from theme_manager import ThemeManager
+from auto_saver import AutoSaver
+from time_format import load_time_formats
+import startup
 
 
 class TodoApp:
     """待办事项应用主类"""
 
+    AUTOSAVE_DELAY = 0.5  # 自动保存合并窗口（秒）
+    USE_JOURNAL = False  # 是否使用日志式存储（逐条记录任务操作，不再每次整份保存）
+    DATA_FILE = "todo_data.json"  # 数据文件，扩展名为 .db / .sqlite 时使用 SQLite 存储
+    BACKUP_COUNT = 1  # 保存 JSON 快照时保留的旧文件份数
+    INITIAL_LOAD_COUNT = TodoUI.VIRTUAL_WINDOW_SIZE + TodoUI.VIRTUAL_BUFFER  # 显示界面前同步恢复的任务数（首屏）
+    LOAD_BATCH_SIZE = 500  # 后台加载时每批恢复的任务数
+    LOAD_REFRESH_INTERVAL = 0.25  # 后台加载时刷新界面的最小间隔（秒）
+    TIME_FORMAT_FILE = "time_formats.json"  # 自定义时间格式配置：名称 -> strftime 模式，如 {"月日": "%m月%d日 %H:%M"}
+
     def __init__(self, page: ft.Page):
         self.page = page
 
+        # 注册配置文件中的自定义时间格式（任务的时间格式选项中可选）
+        load_time_formats(self.TIME_FORMAT_FILE)
+
         # 初始化数据存储
-        self.storage = DataStorage()
+        self.storage = self._create_storage()
+
+        # 自动保存：合并频繁修改，在后台线程写入
+        self.auto_saver = AutoSaver(self._save_data, self.AUTOSAVE_DELAY)
+
+        # 后台加载剩余任务：加载完成前不保存，避免用不完整的数据覆盖文件
+        self._pending_tasks = None
+        self._loaded = threading.Event()
 
         # 初始化主题管理器
         self.theme_manager = ThemeManager(page)
@@ -32,14 +60,34 @@ class TodoApp:
 
         # 加载保存的数据
         self._load_data()
+        startup.mark("加载首屏数据")
 
         # 设置回调
         self.task_manager.set_on_list_changed(self._on_task_list_changed)
+        self.task_manager.set_on_task_op(self.storage.record_op)
+        if self.storage.supports_queries():
+            # 分类筛选和排序下推给存储的索引查询
+            self.task_manager.set_query_backend(self.storage)
         self.category_manager.set_on_category_changed(self._on_category_changed)
         self.theme_manager.set_on_theme_changed(self._on_theme_changed)
 
         # 构建并显示UI
         self._build_and_show_ui()
+        startup.mark("首屏任务列表（已发送）")
+        startup.report()
+
+        # 首屏显示后在后台继续恢复其余任务
+        self._start_background_load()
+
+    def _create_storage(self):
+        """根据数据文件类型创建存储（私有方法）"""
+        if self.DATA_FILE.endswith((".db", ".sqlite")):
+            return SQLiteStorage(self.DATA_FILE)
+        if self.DATA_FILE.endswith(".tdb"):
+            return BinaryStorage(self.DATA_FILE, self.BACKUP_COUNT)
+        if self.USE_JOURNAL:
+            return JournalStorage(self.DATA_FILE, backup_count=self.BACKUP_COUNT)
+        return DataStorage(self.DATA_FILE, self.BACKUP_COUNT)
 
     def _setup_page(self):
         """配置页面属性（私有方法）"""
@@ -58,19 +106,20 @@ class TodoApp:
         self.page.on_close = self._on_window_close
 
     def _load_data(self):
-        """加载保存的数据"""
-        data = self.storage.load_data()
+        """加载保存的数据（只恢复首屏任务，其余任务由 _start_background_load 在后台恢复）"""
+        stream = self.storage.load_stream()
 
-        if data is None:
+        if stream is None:
             # 没有保存的数据，使用默认设置
             return
 
+        data, tasks = stream
         try:
-            # 清空现有数据
-            self.category_manager.clear_categories()
-
             # 恢复分类
             if "categories" in data:
+                # 清空现有数据
+                self.category_manager.clear_categories()
+
                 for cat_data in data["categories"]:
                     self.category_manager.restore_category(
                         cat_data["name"],
@@ -86,23 +135,10 @@ class TodoApp:
                     else:
                         self.category_manager.current_category = self.category_manager.get_all_categories()[0]
 
-            # 恢复任务
-            if "tasks" in data:
-                for task_data in data["tasks"]:
-                    priority = DataStorage.deserialize_priority(task_data.get("priority", "无"))
-                    task = self.task_manager.restore_task(
-                        task_data["text"],
-                        priority,
-                        task_data.get("category", "默认"),
-                        task_data.get("completed", False),
-                        task_data.get("subtasks", []),
-                        task_data.get("created_time"),
-                        task_data.get("completed_time"),
-                        task_data.get("time_format")
-                    )
-                    # 为恢复的任务设置主题管理器
-                    if task:
-                        task.set_theme_manager(self.theme_manager)
+            # 恢复首屏任务（只恢复数据，UI组件在任务显示时才构建）
+            loaded = self._restore_tasks(islice(tasks, self.INITIAL_LOAD_COUNT))
+            self._pending_tasks = tasks
+            self.ui_builder.set_loading_progress(loaded)
 
             # 恢复排序模式
             if "sort_mode" in data:
@@ -114,16 +150,61 @@ class TodoApp:
             self.category_manager.clear_categories()
             self.category_manager._init_default_categories()
 
+    def _restore_tasks(self, task_data_list):
+        """恢复一批任务，返回恢复的数量"""
+        records = [DataStorage.deserialize_task(task_data) for task_data in task_data_list]
+        for task in self.task_manager.restore_records(records):
+            # 为恢复的任务设置主题管理器
+            task.set_theme_manager(self.theme_manager)
+        return len(records)
+
+    def _start_background_load(self):
+        """启动后台线程恢复首屏之外的任务"""
+        if self._pending_tasks is None:
+            self._loaded.set()
+            return
+        threading.Thread(target=self._load_remaining, name="TaskLoader", daemon=True).start()
+
+    def _load_remaining(self):
+        """分批解析并恢复剩余任务，并在统计栏显示加载进度"""
+        tasks, self._pending_tasks = self._pending_tasks, None
+        # 恢复的任务在索引中排在加载期间新添加的任务之前，保持原有顺序
+        loaded = self.task_manager.get_stats().get_total()
+        last_refresh = time.perf_counter()
+        try:
+            while True:
+                count = self._restore_tasks(islice(tasks, self.LOAD_BATCH_SIZE))
+                if count == 0:
+                    break
+                loaded += count
+
+                now = time.perf_counter()
+                if now - last_refresh >= self.LOAD_REFRESH_INTERVAL:
+                    last_refresh = now
+                    self.ui_builder.set_loading_progress(loaded)
+                    self.ui_builder.refresh_task_list()
+        except Exception as e:
+            print(f"加载数据时出错: {e}")
+        finally:
+            tasks.close()
+            self._loaded.set()
+            self.ui_builder.set_loading_progress(None)
+            self.ui_builder.refresh_task_list()
+
     def _save_data(self):
-        """保存数据到文件"""
+        """保存数据到文件（后台加载完成后才写入）"""
+        self._loaded.wait()
         categories = self.category_manager.get_all_categories()
-        tasks = self.task_manager.get_all_tasks()
+        tasks = self.task_manager.get_all_records()
         sort_mode = self.task_manager.get_sort_mode()
         self.storage.save_data(tasks, categories, sort_mode)
 
     def _on_window_close(self, e):
-        """窗口关闭时保存数据"""
-        self._save_data()
+        """窗口关闭时保存数据（写入所有尚未保存的修改）"""
+        self.auto_saver.request_save()
+        self.auto_saver.close()
+        self.storage.close()
+        self.ui_builder.time_ticker.stop()
 
     def _build_and_show_ui(self):
         """构建并显示UI（私有方法）"""
@@ -136,16 +217,16 @@ class TodoApp:
     def _on_task_list_changed(self):
         """任务列表变化回调（私有方法）"""
         self.ui_builder.refresh_task_list()
-        # 自动保存数据
-        self._save_data()
+        # 自动保存数据（合并后在后台写入）
+        self.auto_saver.request_save()
 
     def _on_category_changed(self, category):
         """分类改变回调（私有方法）"""
         self.ui_builder.refresh_task_list()
-        # 自动保存数据
-        self._save_data()
+        # 自动保存数据（合并后在后台写入）
+        self.auto_saver.request_save()
 
     def _on_theme_changed(self, is_dark):
         """主题改变回调（私有方法）"""
-        # 刷新整个UI以应用新主题
-        self.ui_builder.rebuild_ui()
+        # 控件颜色随页面主题自动切换，只需更新主题按钮图标
+        self.ui_builder.update_theme_button(is_dark)
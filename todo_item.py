@@ -1,35 +1,77 @@
 import flet as ft
+import threading
+from contextlib import contextmanager
 from priority import Priority
 from datetime import datetime
+from task_model import TaskRecord, SubTaskRecord
+from theme_manager import DARK_PALETTE
+from time_format import get_time_format, get_time_format_names
+
+
+_batch_state = threading.local()  # 各线程中正在进行的批量修改层数
+
+
+@contextmanager
+def suspend_page_updates():
+    """批量修改期间暂停任务修改引起的 page.update()（只对当前线程生效，可嵌套）"""
+    _batch_state.depth = getattr(_batch_state, "depth", 0) + 1
+    try:
+        yield
+    finally:
+        _batch_state.depth -= 1
+
+
+def _update_page(page):
+    """刷新页面（批量修改期间跳过，由批量结束时统一刷新）"""
+    if not getattr(_batch_state, "depth", 0):
+        page.update()
+
+
+def _get_colors(theme_manager):
+    """获取控件使用的调色板（未设置主题管理器时使用内置深色主题的颜色）"""
+    return theme_manager.colors if theme_manager else DARK_PALETTE
 
 
 class SubTask:
-    """子任务类"""
+    """子任务类（子任务数据的视图，UI组件按需构建）"""
 
-    def __init__(self, text, page, theme_manager=None):
-        self.text = text
+    __slots__ = (
+        "record", "page", "theme_manager", "on_status_change_callback", "container", "checkbox", "label",
+        "styled_colors",  # 控件颜色使用的调色板（构建或上次设置颜色时）
+    )
+
+    def __init__(self, text, page, theme_manager=None, record=None):
+        self.record = record if record is not None else SubTaskRecord(text)
         self.page = page
         self.theme_manager = theme_manager
-        self.completed = False
         self.on_status_change_callback = None
-        self._build_ui()
+        # UI 组件延迟到首次显示时构建
+        self.container = None
+        self.checkbox = None
+        self.label = None
+        self.styled_colors = None
 
     def _build_ui(self):
         """构建子任务UI"""
-        text_color = self.theme_manager.get_subtitle_color() if self.theme_manager else ft.Colors.WHITE70
-        primary_color = self.theme_manager.get_secondary_color() if self.theme_manager else ft.Colors.INDIGO_300
+        colors = _get_colors(self.theme_manager)
+        self.styled_colors = colors
+        text_color = colors.subtitle
+        primary_color = colors.secondary
+        completed_color = colors.completed_text
 
         self.checkbox = ft.Checkbox(
-            value=False,
+            value=self.record.completed,
             on_change=self._on_checkbox_changed,
             fill_color=primary_color,
         )
 
         self.label = ft.Text(
-            self.text,
+            self.record.text,
             size=14,
-            color=text_color,
+            color=completed_color if self.record.completed else text_color,
         )
+        if self.record.completed:
+            self.label.text_decoration = ft.TextDecoration.LINE_THROUGH
 
         self.container = ft.Container(
             content=ft.Row(
@@ -43,19 +85,20 @@ class SubTask:
 
     def _on_checkbox_changed(self, e):
         """checkbox 状态改变处理"""
-        self.completed = self.checkbox.value
+        self.record.completed = self.checkbox.value
 
-        completed_color = self.theme_manager.get_completed_text_color() if self.theme_manager else ft.Colors.GREY_600
-        text_color = self.theme_manager.get_subtitle_color() if self.theme_manager else ft.Colors.WHITE70
+        colors = _get_colors(self.theme_manager)
+        completed_color = colors.completed_text
+        text_color = colors.subtitle
 
-        if self.completed:
+        if self.record.completed:
             self.label.color = completed_color
             self.label.text_decoration = ft.TextDecoration.LINE_THROUGH
         else:
             self.label.color = text_color
             self.label.text_decoration = None
 
-        self.page.update()
+        _update_page(self.page)
 
         if self.on_status_change_callback:
             self.on_status_change_callback(self)
@@ -64,70 +107,132 @@ class SubTask:
         """设置状态改变回调"""
         self.on_status_change_callback = callback
 
+    def restore_completed(self, completed):
+        """恢复完成状态（用于加载保存的数据，不触发回调）"""
+        self.record.completed = completed
+        if self.container is not None:
+            colors = _get_colors(self.theme_manager)
+            completed_color = colors.completed_text
+            text_color = colors.subtitle
+            self.checkbox.value = completed
+            self.label.color = completed_color if completed else text_color
+            self.label.text_decoration = ft.TextDecoration.LINE_THROUGH if completed else None
+
     def get_container(self):
-        """获取容器组件"""
+        """获取容器组件（首次调用时构建UI）"""
+        if self.container is None:
+            self._build_ui()
         return self.container
 
+    def is_built(self):
+        """UI 是否已构建"""
+        return self.container is not None
+
+    def release_ui(self):
+        """释放UI组件（离开可见区域时调用，数据保留）"""
+        self.container = None
+        self.checkbox = None
+        self.label = None
+        self.styled_colors = None
+
+    def is_styled_with(self, colors):
+        """控件是否已使用该调色板设置颜色（未构建UI时无需设置）"""
+        return self.container is None or self.styled_colors is colors
+
+    def update_theme_colors(self):
+        """按主题管理器的调色板重设控件颜色"""
+        colors = _get_colors(self.theme_manager)
+        self.styled_colors = colors
+        self.label.color = colors.completed_text if self.record.completed else colors.subtitle
+        self.checkbox.fill_color = colors.secondary
+
     def is_completed(self):
         """是否已完成"""
-        return self.completed
+        return self.record.completed
 
+    def get_id(self):
+        """获取子任务 id"""
+        return self.record.subtask_id
 
-class TodoItem:
-    """单个待办事项类"""
 
-    def __init__(self, task_text, page, priority=Priority.NONE, category="默认"):
-        self.task_text = task_text
+class TodoItem:
+    """单个待办事项类（任务数据的视图，UI组件在任务显示时按需构建）"""
+
+    # 延迟构建的UI组件属性，释放UI时一并清空
+    _VIEW_ATTRS = (
+        "priority_icon", "task_label", "category_chip", "time_info", "checkbox",
+        "expand_button", "add_subtask_button", "delete_button", "subtasks_column", "container",
+        "styled_colors",  # 控件颜色使用的调色板（构建或上次设置颜色时）
+    )
+
+    # 调试计数：设置主题时实际重设控件颜色的次数，以及调色板未变化而跳过的次数
+    restyle_count = 0
+    restyle_skipped_count = 0
+
+    __slots__ = (
+        "record", "page", "subtasks", "expanded", "theme_manager",
+        "on_delete_callback", "on_status_change_callback", "on_category_change_request",
+        "on_change_callback",
+    ) + _VIEW_ATTRS
+
+    def __init__(self, task_text, page, priority=Priority.NONE, category="默认", record=None):
+        # 任务数据（文本、优先级、分类、时间、子任务）
+        self.record = record if record is not None else TaskRecord(task_text, priority, category)
         self.page = page
-        self.completed = False
-        self.priority = priority
-        self.category = category  # 任务所属分类
-        self.subtasks = []
-        self.expanded = False  # 子任务是否展开
         self.theme_manager = None  # 主题管理器
 
-        # 时间字段
-        self.created_time = datetime.now()  # 添加时间
-        self.completed_time = None  # 完成时间
+        # 子任务视图与 record.subtasks 一一对应
+        self.subtasks = []
+        for subtask_record in self.record.subtasks:
+            self._wrap_subtask(subtask_record)
+        self.expanded = len(self.subtasks) > 0  # 子任务是否展开
 
         self.on_delete_callback = None
         self.on_status_change_callback = None
+        self.on_category_change_request = None
+        self.on_change_callback = None  # 数据修改回调：(task, op, payload)
 
-        # 构建UI组件
-        self._build_ui()
+        # UI组件延迟到任务首次显示时构建（get_container）
+        for name in self._VIEW_ATTRS:
+            setattr(self, name, None)
 
     def _build_ui(self):
         """构建UI组件（私有方法）"""
         # 获取主题颜色
-        text_color = self.theme_manager.get_text_color() if self.theme_manager else ft.Colors.WHITE
-        secondary_text_color = self.theme_manager.get_secondary_text_color() if self.theme_manager else ft.Colors.GREY_400
-        chip_bg_color = self.theme_manager.get_chip_bg_color() if self.theme_manager else ft.Colors.with_opacity(0.2, ft.Colors.INDIGO_400)
-        chip_text_color = self.theme_manager.get_chip_text_color() if self.theme_manager else ft.Colors.INDIGO_200
-        item_bg_color = self.theme_manager.get_item_bg_color() if self.theme_manager else ft.Colors.GREY_800
-        primary_color = self.theme_manager.get_primary_color() if self.theme_manager else ft.Colors.INDIGO_400
-        secondary_color = self.theme_manager.get_secondary_color() if self.theme_manager else ft.Colors.INDIGO_300
-        icon_color = self.theme_manager.get_icon_color() if self.theme_manager else ft.Colors.GREY_500
+        colors = _get_colors(self.theme_manager)
+        text_color = colors.text
+        secondary_text_color = colors.secondary_text
+        chip_bg_color = colors.chip_bg
+        chip_text_color = colors.chip_text
+        item_bg_color = colors.item_bg
+        primary_color = colors.primary
+        secondary_color = colors.secondary
+        icon_color = colors.icon
+        completed_color = colors.completed_text
+        self.styled_colors = colors
 
         # 优先级图标
         self.priority_icon = ft.IconButton(
-            icon=Priority.get_icon(self.priority),
-            icon_color=Priority.get_color(self.priority),
+            icon=Priority.get_icon(self.record.priority),
+            icon_color=Priority.get_color(self.record.priority),
             icon_size=20,
-            tooltip=f"优先级: {self.priority.value}",
+            tooltip=f"优先级: {self.record.priority.value}",
             on_click=self._on_priority_clicked,
         )
 
         # 创建任务文本
         self.task_label = ft.Text(
-            self.task_text,
+            self.record.text,
             size=16,
-            color=text_color,
+            color=completed_color if self.record.completed else text_color,
         )
+        if self.record.completed:
+            self.task_label.text_decoration = ft.TextDecoration.LINE_THROUGH
 
         # 分类标签（可点击修改）
         self.category_chip = ft.Container(
             content=ft.Text(
-                f"📁 {self.category}",
+                f"📁 {self.record.category}",
                 size=11,
                 color=chip_text_color,
             ),
@@ -155,18 +260,18 @@ class TodoItem:
 
         # 创建 checkbox 用于标记完成状态
         self.checkbox = ft.Checkbox(
-            value=False,
+            value=self.record.completed,
             on_change=self._on_checkbox_changed,
             fill_color=primary_color
         )
 
         # 子任务展开/折叠按钮
         self.expand_button = ft.IconButton(
-            icon=ft.Icons.CHEVRON_RIGHT,
+            icon=ft.Icons.EXPAND_MORE if self.expanded else ft.Icons.CHEVRON_RIGHT,
             icon_size=20,
             icon_color=icon_color,
             on_click=self._on_expand_clicked,
-            visible=False,  # 默认不显示，有子任务时才显示
+            visible=len(self.subtasks) > 0,  # 有子任务时才显示
         )
 
         # 添加子任务按钮
@@ -189,9 +294,9 @@ class TodoItem:
 
         # 子任务容器
         self.subtasks_column = ft.Column(
-            controls=[],
+            controls=[subtask.get_container() for subtask in self.subtasks],
             spacing=0,
-            visible=False,
+            visible=self.expanded,
         )
 
         # 主任务行
@@ -233,7 +338,7 @@ class TodoItem:
             border_radius=12,
             padding=ft.Padding(left=16, right=16, top=8, bottom=8),
             margin=ft.Margin(left=0, right=0, top=0, bottom=8),
-            border=ft.border.all(2, Priority.get_color(self.priority)) if self.priority != Priority.NONE else None,
+            border=ft.border.all(2, Priority.get_color(self.record.priority)) if self.record.priority != Priority.NONE else None,
             animate=ft.Animation(300, "easeOut"),
         )
 
@@ -241,25 +346,35 @@ class TodoItem:
         """优先级点击处理"""
         # 循环切换优先级
         priorities = [Priority.NONE, Priority.LOW, Priority.MEDIUM, Priority.HIGH]
-        current_index = priorities.index(self.priority)
+        current_index = priorities.index(self.record.priority)
         next_index = (current_index + 1) % len(priorities)
-        self.priority = priorities[next_index]
+        self.record.priority = priorities[next_index]
 
         # 更新UI
-        self.priority_icon.icon = Priority.get_icon(self.priority)
-        self.priority_icon.icon_color = Priority.get_color(self.priority)
-        self.priority_icon.tooltip = f"优先级: {self.priority.value}"
-        self.container.border = ft.border.all(2, Priority.get_color(self.priority)) if self.priority != Priority.NONE else None
+        self.priority_icon.icon = Priority.get_icon(self.record.priority)
+        self.priority_icon.icon_color = Priority.get_color(self.record.priority)
+        self.priority_icon.tooltip = f"优先级: {self.record.priority.value}"
+        self.container.border = ft.border.all(2, Priority.get_color(self.record.priority)) if self.record.priority != Priority.NONE else None
 
-        self.page.update()
+        _update_page(self.page)
+
+        self._notify_change("priority", {"priority": self.record.priority})
+        # 触发保存
+        if self.on_status_change_callback:
+            self.on_status_change_callback(self)
 
     def _on_expand_clicked(self, e):
         """展开/折叠子任务"""
-        self.expanded = not self.expanded
-        self.subtasks_column.visible = self.expanded
-        self.expand_button.icon = ft.Icons.EXPAND_MORE if self.expanded else ft.Icons.CHEVRON_RIGHT
+        self.set_expanded(not self.expanded)
         self.page.update()
 
+    def set_expanded(self, expanded):
+        """设置子任务是否展开（UI 尚未构建时只记录状态，构建时按该状态生成）"""
+        self.expanded = expanded
+        if self.container is not None:
+            self.subtasks_column.visible = expanded
+            self.expand_button.icon = ft.Icons.EXPAND_MORE if expanded else ft.Icons.CHEVRON_RIGHT
+
     def _on_add_subtask_clicked(self, e):
         """添加子任务按钮点击处理"""
         # 创建输入对话框
@@ -275,6 +390,9 @@ class TodoItem:
         def add_subtask(e):
             if subtask_field.value and subtask_field.value.strip():
                 self.add_subtask(subtask_field.value.strip())
+                # 触发保存
+                if self.on_status_change_callback:
+                    self.on_status_change_callback(self)
                 close_dialog(e)
 
         dialog = ft.AlertDialog(
@@ -290,17 +408,37 @@ class TodoItem:
         dialog.open = True
         self.page.update()
 
-    def add_subtask(self, text):
+    def add_subtask(self, text, completed=False):
         """添加子任务"""
-        subtask = SubTask(text, self.page, self.theme_manager)
-        subtask.set_on_status_change(self._on_subtask_status_changed)
-        self.subtasks.append(subtask)
+        subtask_record = SubTaskRecord(text, completed)
+        self.record.subtasks.append(subtask_record)
+        subtask = self._wrap_subtask(subtask_record)
+        self._notify_change("subtask_add", {
+            "subtask_id": subtask_record.subtask_id,
+            "text": text,
+            "completed": completed,
+        })
+
+        # 有子任务时自动展开
+        self.expanded = True
 
         # 更新UI
         self._refresh_subtasks_display()
+        return subtask
+
+    def _wrap_subtask(self, subtask_record):
+        """为子任务数据创建视图"""
+        subtask = SubTask(subtask_record.text, self.page, self.theme_manager, subtask_record)
+        subtask.set_on_status_change(self._on_subtask_status_changed)
+        self.subtasks.append(subtask)
+        return subtask
 
     def _refresh_subtasks_display(self):
         """刷新子任务显示"""
+        # UI 尚未构建时无需刷新，构建时会按当前状态生成
+        if self.container is None:
+            return
+
         self.subtasks_column.controls.clear()
         for subtask in self.subtasks:
             self.subtasks_column.controls.append(subtask.get_container())
@@ -314,41 +452,58 @@ class TodoItem:
             self.subtasks_column.visible = True
             self.expand_button.icon = ft.Icons.EXPAND_MORE
 
-        self.page.update()
+        _update_page(self.page)
 
     def _on_subtask_status_changed(self, subtask):
         """子任务状态改变回调"""
+        self._notify_change("subtask_complete", {
+            "subtask_id": subtask.get_id(),
+            "completed": subtask.record.completed,
+        })
+
         # 检查是否所有子任务都完成
-        if self.subtasks:
-            all_completed = all(st.is_completed() for st in self.subtasks)
-            if all_completed and not self.completed:
-                # 自动完成主任务
-                self.checkbox.value = True
-                self._on_checkbox_changed(None)
+        all_completed = all(st.is_completed() for st in self.subtasks)
+        if all_completed and not self.record.completed:
+            # 自动完成主任务（会触发保存）
+            self.checkbox.value = True
+            self._on_checkbox_changed(None)
+        elif self.on_status_change_callback:
+            # 触发保存
+            self.on_status_change_callback(self)
+
+    def _notify_change(self, op, payload):
+        """通知数据修改（用于增量保存等）"""
+        if self.on_change_callback:
+            self.on_change_callback(self, op, payload)
 
     def _on_checkbox_changed(self, e):
         """checkbox 状态改变处理（私有方法）"""
-        self.completed = self.checkbox.value
+        self.record.completed = self.checkbox.value
 
-        completed_color = self.theme_manager.get_completed_text_color() if self.theme_manager else ft.Colors.GREY_500
-        text_color = self.theme_manager.get_text_color() if self.theme_manager else ft.Colors.WHITE
+        colors = _get_colors(self.theme_manager)
+        completed_color = colors.completed_text
+        text_color = colors.text
 
-        if self.completed:
+        if self.record.completed:
             # 已完成：记录完成时间，文字变灰并添加删除线
-            self.completed_time = datetime.now()
+            self.record.completed_time = datetime.now()
             self.task_label.color = completed_color
             self.task_label.text_decoration = ft.TextDecoration.LINE_THROUGH
         else:
             # 未完成：清除完成时间，恢复正常样式
-            self.completed_time = None
+            self.record.completed_time = None
             self.task_label.color = text_color
             self.task_label.text_decoration = None
 
         # 更新时间信息显示
-        if hasattr(self, 'time_info'):
-            self.time_info.content.value = self._format_time_info()
+        self.time_info.content.value = self._format_time_info()
 
-        self.page.update()
+        _update_page(self.page)
+
+        self._notify_change("complete", {
+            "completed": self.record.completed,
+            "completed_time": self.record.completed_time,
+        })
 
         if self.on_status_change_callback:
             self.on_status_change_callback(self)
@@ -358,38 +513,32 @@ class TodoItem:
         # 创建时间编辑对话框
         created_date_field = ft.TextField(
             label="创建日期 (YYYY-MM-DD)",
-            value=self.created_time.strftime('%Y-%m-%d'),
+            value=self.record.created_time.strftime('%Y-%m-%d'),
             width=200,
         )
         created_time_field = ft.TextField(
             label="创建时间 (HH:MM)",
-            value=self.created_time.strftime('%H:%M'),
+            value=self.record.created_time.strftime('%H:%M'),
             width=150,
         )
 
         completed_date_field = ft.TextField(
             label="完成日期 (YYYY-MM-DD)",
-            value=self.completed_time.strftime('%Y-%m-%d') if self.completed_time else "",
+            value=self.record.completed_time.strftime('%Y-%m-%d') if self.record.completed_time else "",
             width=200,
-            disabled=not self.completed,
+            disabled=not self.record.completed,
         )
         completed_time_field = ft.TextField(
             label="完成时间 (HH:MM)",
-            value=self.completed_time.strftime('%H:%M') if self.completed_time else "",
+            value=self.record.completed_time.strftime('%H:%M') if self.record.completed_time else "",
             width=150,
-            disabled=not self.completed,
+            disabled=not self.record.completed,
         )
 
         # 时间格式选择
-        format_options = [
-            "MM-DD HH:MM",
-            "YYYY-MM-DD HH:MM",
-            "MM/DD HH:MM",
-            "HH:MM MM-DD",
-            "YYYY年MM月DD日 HH:MM",
-        ]
-
-        current_format = getattr(self, 'time_format', "MM-DD HH:MM")
+        format_options = get_time_format_names()
+
+        current_format = self.record.time_format
         format_dropdown = ft.Dropdown(
             label="时间显示格式",
             value=current_format,
@@ -409,18 +558,24 @@ class TodoItem:
                 self.set_created_time(new_created_time)
 
                 # 解析完成时间
-                if self.completed and completed_date_field.value and completed_time_field.value:
+                if self.record.completed and completed_date_field.value and completed_time_field.value:
                     completed_datetime_str = f"{completed_date_field.value} {completed_time_field.value}"
                     new_completed_time = datetime.strptime(completed_datetime_str, '%Y-%m-%d %H:%M')
                     self.set_completed_time(new_completed_time)
 
                 # 保存时间格式
-                self.time_format = format_dropdown.value
+                self.record.time_format = format_dropdown.value
 
                 # 更新显示
                 self.time_info.content.value = self._format_time_info()
                 self.page.update()
 
+                self._notify_change("time", {
+                    "created_time": self.record.created_time,
+                    "completed_time": self.record.completed_time,
+                    "time_format": self.record.time_format,
+                })
+
                 # 触发保存
                 if self.on_status_change_callback:
                     self.on_status_change_callback(self)
@@ -470,7 +625,7 @@ class TodoItem:
         """分类标签点击处理 - 修改分类"""
         # 需要从外部获取所有分类列表
         # 通过回调函数获取
-        if hasattr(self, 'on_category_change_request'):
+        if self.on_category_change_request:
             self.on_category_change_request(self)
 
     def _on_delete_clicked(self, e):
@@ -486,145 +641,188 @@ class TodoItem:
         """设置状态改变回调"""
         self.on_status_change_callback = callback
 
+    def set_on_change(self, callback):
+        """设置数据修改回调"""
+        self.on_change_callback = callback
+
     def get_container(self):
-        """获取容器组件"""
+        """获取容器组件（首次调用时构建UI）"""
+        if self.container is None:
+            self._build_ui()
         return self.container
 
+    def is_built(self):
+        """UI 是否已构建"""
+        return self.container is not None
+
+    def release_ui(self):
+        """释放UI组件（任务离开可见区域时调用，数据保留）"""
+        if self.container is None:
+            return
+        for name in self._VIEW_ATTRS:
+            setattr(self, name, None)
+        for subtask in self.subtasks:
+            subtask.release_ui()
+
+    def restore_completed(self, completed):
+        """恢复完成状态（用于加载保存的数据，不记录完成时间也不触发回调）"""
+        self.record.completed = completed
+        if self.container is not None:
+            colors = _get_colors(self.theme_manager)
+            completed_color = colors.completed_text
+            text_color = colors.text
+            self.checkbox.value = completed
+            self.task_label.color = completed_color if completed else text_color
+            self.task_label.text_decoration = ft.TextDecoration.LINE_THROUGH if completed else None
+
+    def get_record(self):
+        """获取任务数据"""
+        return self.record
+
+    def get_id(self):
+        """获取任务 id"""
+        return self.record.task_id
+
     def is_completed(self):
         """是否已完成"""
-        return self.completed
+        return self.record.completed
 
     def get_text(self):
         """获取任务文本"""
-        return self.task_text
+        return self.record.text
 
     def get_priority(self):
         """获取优先级"""
-        return self.priority
+        return self.record.priority
 
     def get_category(self):
         """获取分类"""
-        return self.category
+        return self.record.category
 
     def set_category(self, category):
         """设置分类"""
-        self.category = category
+        self.record.category = category
+        self._notify_change("category", {"category": category})
         # 更新UI显示
-        if hasattr(self, 'category_chip'):
+        if self.container is not None:
             self.category_chip.content.value = f"📁 {category}"
-            self.page.update()
+            _update_page(self.page)
 
     def set_on_category_change_request(self, callback):
         """设置分类修改请求回调"""
         self.on_category_change_request = callback
 
+    def get_subtask(self, subtask_id):
+        """根据 id 获取子任务"""
+        for subtask in self.subtasks:
+            if subtask.get_id() == subtask_id:
+                return subtask
+        return None
+
     def get_subtasks_count(self):
         """获取子任务数量"""
         return len(self.subtasks)
 
     def get_completed_subtasks_count(self):
         """获取已完成的子任务数量"""
-        return sum(1 for st in self.subtasks if st.is_completed())
+        return self.record.get_completed_subtasks_count()
 
     def _format_time_info(self):
-        """格式化时间信息显示"""
-        time_format = getattr(self, 'time_format', "MM-DD HH:MM")
-
-        # 根据格式选项格式化时间
-        if time_format == "MM-DD HH:MM":
-            created_str = f"创建: {self.created_time.strftime('%m-%d %H:%M')}"
-            completed_str = f"完成: {self.completed_time.strftime('%m-%d %H:%M')}" if self.completed_time else None
-        elif time_format == "YYYY-MM-DD HH:MM":
-            created_str = f"创建: {self.created_time.strftime('%Y-%m-%d %H:%M')}"
-            completed_str = f"完成: {self.completed_time.strftime('%Y-%m-%d %H:%M')}" if self.completed_time else None
-        elif time_format == "MM/DD HH:MM":
-            created_str = f"创建: {self.created_time.strftime('%m/%d %H:%M')}"
-            completed_str = f"完成: {self.completed_time.strftime('%m/%d %H:%M')}" if self.completed_time else None
-        elif time_format == "HH:MM MM-DD":
-            created_str = f"创建: {self.created_time.strftime('%H:%M %m-%d')}"
-            completed_str = f"完成: {self.completed_time.strftime('%H:%M %m-%d')}" if self.completed_time else None
-        elif time_format == "YYYY年MM月DD日 HH:MM":
-            created_str = f"创建: {self.created_time.strftime('%Y年%m月%d日 %H:%M')}"
-            completed_str = f"完成: {self.completed_time.strftime('%Y年%m月%d日 %H:%M')}" if self.completed_time else None
-        else:
-            # 默认格式
-            created_str = f"创建: {self.created_time.strftime('%m-%d %H:%M')}"
-            completed_str = f"完成: {self.completed_time.strftime('%m-%d %H:%M')}" if self.completed_time else None
-
-        if completed_str:
-            return f"{created_str} | {completed_str}"
+        """格式化时间信息显示（使用共享的时间格式，格式化结果已缓存）"""
+        time_format = get_time_format(self.record.time_format)
+        created_str = f"创建: {time_format.format(self.record.created_time)}"
+        if self.record.completed_time:
+            return f"{created_str} | 完成: {time_format.format(self.record.completed_time)}"
         return created_str
 
+    def refresh_relative_time(self):
+        """刷新相对时间的显示（定时调用），返回显示内容是否变化"""
+        if self.container is None or not get_time_format(self.record.time_format).is_relative:
+            return False
+        label = self._format_time_info()
+        if label == self.time_info.content.value:
+            return False
+        self.time_info.content.value = label
+        return True
+
     def get_created_time(self):
         """获取创建时间"""
-        return self.created_time
+        return self.record.created_time
 
     def get_completed_time(self):
         """获取完成时间"""
-        return self.completed_time
+        return self.record.completed_time
 
     def set_created_time(self, time):
         """设置创建时间"""
-        self.created_time = time
-        if hasattr(self, 'time_info'):
+        self.record.created_time = time
+        if self.container is not None:
             self.time_info.content.value = self._format_time_info()
 
     def set_completed_time(self, time):
         """设置完成时间"""
-        self.completed_time = time
-        if hasattr(self, 'time_info'):
+        self.record.completed_time = time
+        if self.container is not None:
             self.time_info.content.value = self._format_time_info()
 
     def get_time_format(self):
         """获取时间格式"""
-        return getattr(self, 'time_format', "MM-DD HH:MM")
+        return self.record.time_format
 
     def set_time_format(self, format_str):
         """设置时间格式"""
-        self.time_format = format_str
-        if hasattr(self, 'time_info'):
+        self.record.time_format = format_str
+        if self.container is not None:
             self.time_info.content.value = self._format_time_info()
 
     def set_theme_manager(self, theme_manager):
-        """设置主题管理器"""
+        """设置主题管理器
+
+        已构建UI时需要更新颜色；调色板不可变，任务和已构建的子任务上次使用的都是同一个对象时无需重设
+        （如用默认颜色构建的子任务仍会重设）
+        """
         self.theme_manager = theme_manager
-        # 如果已经构建了UI，需要更新颜色
-        if hasattr(self, 'task_label'):
-            self._update_theme_colors()
+        # 子任务（包括恢复时尚无主题管理器的子任务）在构建UI时使用同一个主题管理器
+        for subtask in self.subtasks:
+            subtask.theme_manager = theme_manager
+        if self.container is None:
+            return
+        colors = theme_manager.colors
+        if self.styled_colors is colors and all(subtask.is_styled_with(colors) for subtask in self.subtasks):
+            TodoItem.restyle_skipped_count += 1
+            return
+        TodoItem.restyle_count += 1
+        self._update_theme_colors()
 
     def _update_theme_colors(self):
         """更新主题颜色"""
         if not self.theme_manager:
             return
+        colors = self.theme_manager.colors
+        self.styled_colors = colors
 
         # 更新任务文本颜色
-        if self.completed:
-            self.task_label.color = self.theme_manager.get_completed_text_color()
-        else:
-            self.task_label.color = self.theme_manager.get_text_color()
+        self.task_label.color = colors.completed_text if self.record.completed else colors.text
 
         # 更新分类标签颜色
-        self.category_chip.bgcolor = self.theme_manager.get_chip_bg_color()
-        self.category_chip.content.color = self.theme_manager.get_chip_text_color()
+        self.category_chip.bgcolor = colors.chip_bg
+        self.category_chip.content.color = colors.chip_text
 
         # 更新时间信息颜色
-        self.time_info.content.color = self.theme_manager.get_secondary_text_color()
+        self.time_info.content.color = colors.secondary_text
 
         # 更新容器背景色
-        self.container.bgcolor = self.theme_manager.get_item_bg_color()
+        self.container.bgcolor = colors.item_bg
 
         # 更新checkbox颜色
-        self.checkbox.fill_color = self.theme_manager.get_primary_color()
+        self.checkbox.fill_color = colors.primary
 
         # 更新按钮颜色
-        self.expand_button.icon_color = self.theme_manager.get_icon_color()
-        self.add_subtask_button.icon_color = self.theme_manager.get_secondary_color()
+        self.expand_button.icon_color = colors.icon
+        self.add_subtask_button.icon_color = colors.secondary
 
-        # 更新子任务颜色
+        # 更新子任务颜色（只更新使用其他调色板设置过颜色的子任务）
         for subtask in self.subtasks:
             subtask.theme_manager = self.theme_manager
-            if subtask.completed:
-                subtask.label.color = self.theme_manager.get_completed_text_color()
-            else:
-                subtask.label.color = self.theme_manager.get_subtitle_color()
-            subtask.checkbox.fill_color = self.theme_manager.get_secondary_color()
+            if not subtask.is_styled_with(colors):
+                subtask.update_theme_colors()
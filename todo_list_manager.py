@@ -1,6 +1,13 @@
-from todo_item import TodoItem
+import threading
+from contextlib import contextmanager
+from todo_item import TodoItem, suspend_page_updates
 from priority import Priority
-from datetime import datetime
+from data_storage import DataStorage
+from task_stats import TaskStats
+from task_index import TaskIndex
+from sorted_view import SortedViews
+from search_index import SearchIndex
+from task_query import parse_query, run_query
 import flet as ft
 
 
@@ -9,10 +16,20 @@ class TodoListManager:
 
     def __init__(self, page):
         self.page = page
-        self.tasks = []
+        self.index = TaskIndex()  # 任务索引：id -> 任务、按顺序排列的全部任务和各分类任务
         self.on_list_changed_callback = None
+        self.on_task_op_callback = None  # 单个任务操作回调：(op, task, payload)，用于增量保存
         self.category_manager = None  # 用于获取分类列表
-        self.sort_mode = "default"  # 排序模式：default, priority_high, priority_low, time_new, time_old
+        self.sort_mode = "default"  # 排序模式：default 或 sorted_view.SORT_MODES 中的模式
+        self.query_backend = None  # 支持索引查询的存储（如 SQLite），筛选和排序下推给它执行
+        self.stats = TaskStats()  # 增量维护的任务统计（总数、完成数、分类/优先级/日期计数等）
+        self.views = SortedViews(self.index)  # 各排序模式下增量维护的有序视图
+        self.search_index = SearchIndex(self.index)  # 任务和子任务文本的倒排索引
+        self._batch_depth = 0  # 正在进行的批量修改层数
+        self._batch_changed = False  # 批量修改期间是否有列表变化
+        # 任务数据锁：后台加载、自动保存和搜索线程与界面线程共用索引、排序视图和统计，
+        # 修改和需要一致快照的读取都在锁内进行；回调（刷新列表等）在释放锁之后触发
+        self.lock = threading.RLock()
 
     def set_category_manager(self, category_manager):
         """设置分类管理器"""
@@ -25,186 +42,285 @@ class TodoListManager:
 
         # 创建新任务
         task = TodoItem(task_text.strip(), self.page, priority, category)
-        task.set_on_delete(self._on_task_delete)
-        task.set_on_status_change(self._on_task_status_change)
-        task.set_on_category_change_request(self._on_task_category_change_request)
+        self._bind_task(task)
 
         # 添加到列表
-        self.tasks.append(task)
+        with self.lock:
+            self.index.add(task)
+            self.views.add([task])
+            self.search_index.add([task])
+            self.stats.add(task.record)
+            self._emit_task_op("add", task, {"task": task.record})
 
         # 通知列表变化
-        if self.on_list_changed_callback:
-            self.on_list_changed_callback()
+        self._notify_list_changed()
 
         return task
 
     def restore_task(self, task_text, priority, category, completed, subtasks_data, created_time=None, completed_time=None, time_format=None):
         """从数据恢复任务（不触发保存）"""
-        task = TodoItem(task_text, self.page, priority, category)
+        task_data = {
+            "text": task_text,
+            "priority": priority.value,
+            "category": category,
+            "completed": completed,
+            "subtasks": subtasks_data,
+            "created_time": created_time,
+            "completed_time": completed_time,
+            "time_format": time_format,
+        }
+        return self.restore_record(DataStorage.deserialize_task(task_data))
+
+    def restore_record(self, record):
+        """从任务数据恢复任务（不触发保存，也不构建UI组件）"""
+        with self.lock:
+            task = self._restore(record)
+            self.views.add([task])
+            self.search_index.add([task])
+        return task
+
+    def restore_records(self, records):
+        """批量恢复任务，返回恢复的任务列表（恢复的任务排在本次运行中新添加的任务之前）"""
+        with self.lock:
+            tasks = [self._restore(record) for record in records]
+            self.views.add(tasks)
+            self.search_index.add(tasks)
+        return tasks
+
+    def _restore(self, record):
+        """创建任务并加入索引和统计（私有方法）"""
+        task = TodoItem(record.text, self.page, record=record)
+        self._bind_task(task)
+        self.index.add(task, restored=True)
+        self.stats.add(record)
+        return task
+
+    def _bind_task(self, task):
+        """为任务绑定回调（私有方法）"""
         task.set_on_delete(self._on_task_delete)
         task.set_on_status_change(self._on_task_status_change)
         task.set_on_category_change_request(self._on_task_category_change_request)
-
-        # 恢复时间信息
-        if created_time:
-            try:
-                task.set_created_time(datetime.fromisoformat(created_time))
-            except:
-                pass
-
-        if completed_time:
-            try:
-                task.set_completed_time(datetime.fromisoformat(completed_time))
-            except:
-                pass
-
-        # 恢复时间格式
-        if time_format:
-            task.set_time_format(time_format)
-
-        # 恢复完成状态
-        if completed:
-            task.checkbox.value = True
-            task.completed = True
-            # 使用主题管理器提供的颜色（如果有的话）
-            if task.theme_manager:
-                task.task_label.color = task.theme_manager.get_completed_text_color()
-            else:
-                task.task_label.color = ft.Colors.GREY_500
-            task.task_label.text_decoration = ft.TextDecoration.LINE_THROUGH
-
-        # 恢复子任务
-        for subtask_data in subtasks_data:
-            task.add_subtask(subtask_data["text"])
-            # 恢复子任务完成状态
-            if subtask_data["completed"] and len(task.subtasks) > 0:
-                last_subtask = task.subtasks[-1]
-                last_subtask.checkbox.value = True
-                last_subtask.completed = True
-                # 使用主题管理器提供的颜色（如果有的话）
-                if last_subtask.theme_manager:
-                    last_subtask.label.color = last_subtask.theme_manager.get_completed_text_color()
-                else:
-                    last_subtask.label.color = ft.Colors.GREY_600
-                last_subtask.label.text_decoration = ft.TextDecoration.LINE_THROUGH
-
-        self.tasks.append(task)
-        return task
+        task.set_on_change(self._on_task_changed)
 
     def remove_task(self, task):
         """删除任务"""
-        if task in self.tasks:
-            self.tasks.remove(task)
-
+        with self.lock:
+            removed = self.index.remove(task)
+            if removed:
+                self.views.remove([task])
+                self.search_index.remove([task])
+                self.stats.remove(task.record)
+                self._emit_task_op("delete", task, {})
+
+        if removed:
             # 通知列表变化
-            if self.on_list_changed_callback:
-                self.on_list_changed_callback()
+            self._notify_list_changed()
+
+    def remove_task_by_id(self, task_id):
+        """根据 id 删除任务"""
+        task = self.index.get(task_id)
+        if task is not None:
+            self.remove_task(task)
 
     def get_all_tasks(self):
         """获取所有任务"""
-        return self.tasks
+        with self.lock:
+            return self.index.get_tasks()
+
+    def get_task(self, task_id):
+        """根据 id 获取任务"""
+        return self.index.get(task_id)
+
+    def get_all_records(self):
+        """获取所有任务数据（用于保存，在锁内取得一致的快照）"""
+        with self.lock:
+            return [task.record for task in self.index.get_tasks()]
+
+    def set_query_backend(self, backend):
+        """设置支持索引查询的存储，分类筛选、完成状态筛选和排序将下推给它执行"""
+        self.query_backend = backend
+
+    def _query_tasks(self, category_name=None, completed=None, start=0, stop=None):
+        """通过查询后端获取任务（私有方法），start/stop 指定只获取排序后的一段"""
+        category = None if category_name in (None, "全部") else category_name
+        task_ids = self.query_backend.query_task_ids(category, completed, self.sort_mode, start, stop)
+        tasks = (self.index.get(task_id) for task_id in task_ids)
+        return [task for task in tasks if task is not None]
 
     def get_tasks_by_category(self, category_name):
         """根据分类获取任务"""
-        if category_name == "全部":
-            tasks = self.tasks
-        else:
-            tasks = [task for task in self.tasks if task.get_category() == category_name]
-
-        # 应用排序
-        return self._apply_sort(tasks)
+        with self.lock:
+            if self.query_backend:
+                return self._query_tasks(category_name)
+
+            category = None if category_name == "全部" else category_name
+            if self.views.supports(self.sort_mode):
+                return self.views.get_tasks(self.sort_mode, category)
+            # 默认排序：保持添加顺序
+            if category is None:
+                return self.index.get_tasks()
+            return self.index.get_category_tasks(category)
+
+    def get_task_page(self, category_name, start, stop):
+        """获取某个分类排序后第 [start, stop) 个任务（只读取这一段，无需获取整个列表）"""
+        with self.lock:
+            if self.query_backend:
+                return self._query_tasks(category_name, start=start, stop=stop)
+
+            category = None if category_name == "全部" else category_name
+            if self.views.supports(self.sort_mode):
+                return self.views.get_page(self.sort_mode, category, start, stop)
+            return self.index.get_page(category, start, stop)
+
+    def search_tasks(self, query, limit=None):
+        """按查询语句搜索任务，返回匹配的任务（limit 为最多返回的数量）
+
+        查询语句由文本查询词和 cat:分类 pri:优先级 done:yes/no created:日期范围 等条件组成，
+        有文本查询词时按相关度排列，否则按当前排序模式排列。
+        在实时搜索的后台线程中调用：查询计划会读取统计、按需构建排序视图，因此在任务数据锁内执行。
+        """
+        task_query = parse_query(query)
+        with self.lock:
+            if task_query.is_text_only():
+                # 纯文本搜索直接使用搜索索引（可利用查询结果缓存）
+                return self.search_index.search(task_query.get_text(), limit)
+            tasks = run_query(task_query, self)
+        return tasks if limit is None else tasks[:limit]
 
     def get_completed_tasks(self):
         """获取已完成的任务"""
-        return [task for task in self.tasks if task.is_completed()]
+        with self.lock:
+            if self.query_backend:
+                return self._query_tasks(completed=True)
+            return [task for task in self.index.get_tasks() if task.record.completed]
 
     def get_pending_tasks(self):
         """获取未完成的任务"""
-        return [task for task in self.tasks if not task.is_completed()]
+        with self.lock:
+            if self.query_backend:
+                return self._query_tasks(completed=False)
+            return [task for task in self.index.get_tasks() if not task.record.completed]
 
     def clear_completed(self):
         """清除所有已完成的任务"""
-        self.tasks = [task for task in self.tasks if not task.is_completed()]
+        with self.lock:
+            completed_tasks = self.get_completed_tasks()
+            for task in completed_tasks:
+                self.index.remove(task)
+                self.stats.remove(task.record)
+                self._emit_task_op("delete", task, {})
+            self.views.remove(completed_tasks)
+            self.search_index.remove(completed_tasks)
 
         # 通知列表变化
-        if self.on_list_changed_callback:
-            self.on_list_changed_callback()
+        self._notify_list_changed()
+
+    def get_stats(self):
+        """获取任务统计"""
+        return self.stats
 
     def get_category_task_count(self, category_name):
         """获取某个分类的任务数量"""
         if category_name == "全部":
-            return len(self.tasks)
-        return len([task for task in self.tasks if task.get_category() == category_name])
+            return self.stats.get_total()
+        return self.stats.get_category_counts(category_name)[0]
+
+    def get_category_completed_count(self, category_name):
+        """获取某个分类已完成的任务数量"""
+        if category_name == "全部":
+            return self.stats.get_completed()
+        return self.stats.get_category_counts(category_name)[1]
+
+    def get_category_pending_count(self, category_name):
+        """获取某个分类未完成的任务数量"""
+        return self.get_category_task_count(category_name) - self.get_category_completed_count(category_name)
 
     def move_tasks_to_category(self, from_category, to_category):
         """将任务从一个分类移动到另一个分类"""
-        for task in self.tasks:
-            if task.get_category() == from_category:
-                task.set_category(to_category)
+        with self.batch():
+            with self.lock:
+                # 先在索引中整体改挂分类，之后逐个修改任务数据时无需再移动
+                tasks = self.index.get_category_tasks(from_category)
+                self.index.rename_category(from_category, to_category)
+                for task in tasks:
+                    task.set_category(to_category)
 
-        # 通知列表变化
-        if self.on_list_changed_callback:
+            # 通知列表变化
+            self._notify_list_changed()
+
+    @contextmanager
+    def batch(self):
+        """批量修改任务：期间不逐个刷新页面、不触发列表变化回调，结束时只刷新和保存一次（可嵌套）
+
+        with manager.batch():
+            for task in tasks:
+                task.set_category("工作")
+        """
+        self._batch_depth += 1
+        try:
+            with suspend_page_updates():
+                yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._batch_changed:
+                self._batch_changed = False
+                self._notify_list_changed()
+
+    def _notify_list_changed(self):
+        """通知列表变化（批量修改期间推迟到结束时，私有方法）"""
+        if self._batch_depth:
+            self._batch_changed = True
+        elif self.on_list_changed_callback:
             self.on_list_changed_callback()
 
     def set_on_list_changed(self, callback):
         """设置列表变化回调"""
         self.on_list_changed_callback = callback
 
+    def set_on_task_op(self, callback):
+        """设置单个任务操作回调（增加、删除、修改任务数据时触发）"""
+        self.on_task_op_callback = callback
+
     def set_sort_mode(self, mode):
         """设置排序模式"""
         self.sort_mode = mode
         # 触发列表更新
-        if self.on_list_changed_callback:
-            self.on_list_changed_callback()
+        self._notify_list_changed()
 
     def get_sort_mode(self):
         """获取当前排序模式"""
         return self.sort_mode
 
-    def _apply_sort(self, tasks):
-        """应用排序到任务列表"""
-        if self.sort_mode == "default":
-            # 默认不排序，保持原有顺序
-            return tasks
-        elif self.sort_mode == "priority_high":
-            # 优先级从高到低：高 > 中 > 低 > 无
-            priority_order = {
-                Priority.HIGH: 0,
-                Priority.MEDIUM: 1,
-                Priority.LOW: 2,
-                Priority.NONE: 3
-            }
-            return sorted(tasks, key=lambda t: priority_order.get(t.get_priority(), 3))
-        elif self.sort_mode == "priority_low":
-            # 优先级从低到高：无 > 低 > 中 > 高
-            priority_order = {
-                Priority.NONE: 0,
-                Priority.LOW: 1,
-                Priority.MEDIUM: 2,
-                Priority.HIGH: 3
-            }
-            return sorted(tasks, key=lambda t: priority_order.get(t.get_priority(), 0))
-        elif self.sort_mode == "time_new":
-            # 创建时间从新到旧
-            return sorted(tasks, key=lambda t: t.get_created_time(), reverse=True)
-        elif self.sort_mode == "time_old":
-            # 创建时间从旧到新
-            return sorted(tasks, key=lambda t: t.get_created_time())
-        elif self.sort_mode == "status":
-            # 按完成状态：未完成在前，已完成在后
-            return sorted(tasks, key=lambda t: t.is_completed())
-        else:
-            return tasks
-
     def _on_task_delete(self, task):
         """任务删除回调（私有方法）"""
         self.remove_task(task)
 
+    def _on_task_changed(self, task, op, payload):
+        """任务数据修改回调（私有方法）"""
+        with self.lock:
+            if self.index.contains(task.record.task_id):
+                if op == "category":
+                    self.index.move(task)
+                # 只调整该任务在各排序视图中的位置（修改不涉及排序字段时沿用缓存的排序键）
+                self.views.update(task, op)
+                if op == "subtask_add":
+                    self.search_index.update(task)
+                # 更新统计（分类、完成状态、优先级、时间、子任务都会影响统计）
+                self.stats.update(task.record)
+                if self._batch_depth:
+                    # 任务控件的刷新被暂停，批量结束时需要刷新列表
+                    self._batch_changed = True
+            self._emit_task_op(op, task, payload)
+
+    def _emit_task_op(self, op, task, payload):
+        """通知单个任务操作（私有方法）"""
+        if self.on_task_op_callback:
+            self.on_task_op_callback(op, task.record, payload)
+
     def _on_task_status_change(self, task):
         """任务状态改变回调（私有方法）"""
         # 触发保存
-        if self.on_list_changed_callback:
-            self.on_list_changed_callback()
+        self._notify_list_changed()
 
     def _on_task_category_change_request(self, task):
         """任务分类修改请求回调（私有方法）"""
@@ -237,8 +353,7 @@ class TodoListManager:
             if new_category != task.get_category():
                 task.set_category(new_category)
                 # 触发保存
-                if self.on_list_changed_callback:
-                    self.on_list_changed_callback()
+                self._notify_list_changed()
             close_dialog()
 
         dialog = ft.AlertDialog(
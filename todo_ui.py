@@ -1,11 +1,25 @@
 import flet as ft
+import threading
+import time
+from bisect import bisect_left
 from priority import Priority
+from live_search import LiveSearch
+from todo_item import TodoItem
+from time_format import TimeTicker
 from pathlib import Path
 
 
 class TodoUI:
     """UI组件构建类"""
 
+    # 虚拟列表参数：只为可见窗口及前后缓冲区内的任务构建控件
+    VIRTUAL_ITEM_EXTENT = 72  # 估算的单个任务高度（像素，子任务折叠时）
+    VIRTUAL_SUBTASK_EXTENT = 40  # 估算的单个展开子任务高度（像素）
+    VIRTUAL_WINDOW_SIZE = 12  # 收到滚动事件前默认的可见任务数
+    VIRTUAL_BUFFER = 10  # 窗口前后额外构建的任务数
+    SEARCH_RESULT_LIMIT = 200  # 搜索结果最多显示的任务数
+    DEBUG = False  # 调试模式：在统计栏显示最近一次刷新的开销
+
     def __init__(self, page, task_manager, category_manager, theme_manager):
         self.page = page
         self.task_manager = task_manager
@@ -16,7 +30,27 @@ class TodoUI:
         self.category_tabs = None
         self.search_mode = False  # 是否处于搜索模式
         self.search_query = ""  # 搜索关键词
+        self.search_bar = None  # 搜索栏（点击搜索按钮时显示）
+        self.search_field = None
+        self.theme_button = None  # 主题切换按钮
+        self.live_search = LiveSearch(task_manager.search_tasks, self._on_search_results)  # 输入时在后台搜索
+        self._search_results = []  # 当前显示的搜索结果任务（已构建控件）
+        self._render_lock = threading.RLock()  # 搜索结果在后台线程中渲染，与列表刷新互斥
+        self.time_ticker = TimeTicker(self._on_time_tick)  # 定时刷新可见任务的相对时间
         self.main_card = None  # 存储主卡片引用
+        self._rendered_tasks = None  # 任务列表中已渲染的任务（与控件一一对应），None 表示需要完整重建
+        self.last_refresh_stats = {
+            "inserted": 0, "removed": 0, "moved": 0, "restyled": 0, "restyle_skipped": 0, "elapsed_ms": 0.0,
+        }  # 最近一次刷新（或显示搜索结果）的开销
+        self.loading_count = None  # 后台加载中已恢复的任务数量，None 表示未在加载
+
+        # 虚拟列表状态
+        self.virtualized = True  # 是否只渲染可见窗口内的任务
+        self.window_start = 0  # 可见窗口第一个任务的下标
+        self.window_size = self.VIRTUAL_WINDOW_SIZE
+        self._list_category = "全部"  # 当前列表显示的分类
+        self._list_count = 0  # 当前分类下的任务数量
+        self._window_range = (0, 0)  # 已构建控件的任务下标范围 [lo, hi)
 
     def build_main_ui(self):
         """构建主界面"""
@@ -36,7 +70,7 @@ class TodoUI:
         )
 
         # 主题切换按钮
-        theme_button = ft.IconButton(
+        self.theme_button = ft.IconButton(
             icon=ft.Icons.DARK_MODE if self.theme_manager.is_dark() else ft.Icons.LIGHT_MODE,
             icon_color=self.theme_manager.get_secondary_color(),
             tooltip="切换主题",
@@ -83,7 +117,7 @@ class TodoUI:
                     spacing=0,
                 ),
                 ft.Container(expand=True),
-                theme_button,
+                self.theme_button,
                 sort_button,
                 search_button,
                 add_category_button,
@@ -92,15 +126,60 @@ class TodoUI:
             alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
         )
 
+        # 搜索栏：输入时实时筛选任务
+        self.search_field = ft.TextField(
+            value=self.search_query,
+            hint_text="搜索任务和子任务...",
+            prefix_icon=ft.Icons.SEARCH,
+            border_radius=30,
+            bgcolor=self.theme_manager.get_input_bg_color(),
+            border_color=self.theme_manager.get_primary_color(),
+            focused_border_color=self.theme_manager.get_secondary_color(),
+            text_style=ft.TextStyle(color=self.theme_manager.get_text_color()),
+            hint_style=ft.TextStyle(color=self.theme_manager.get_hint_color()),
+            filled=True,
+            dense=True,
+            autofocus=True,
+            expand=True,
+            on_change=self._on_search_changed,
+        )
+        self.search_bar = ft.Container(
+            content=ft.Row(
+                controls=[
+                    self.search_field,
+                    ft.IconButton(
+                        icon=ft.Icons.CLOSE,
+                        icon_color=self.theme_manager.get_icon_color(),
+                        tooltip="关闭搜索",
+                        on_click=self._on_search_closed,
+                    ),
+                ],
+                spacing=8,
+            ),
+            padding=ft.Padding(left=0, right=0, top=0, bottom=10),
+            visible=self.search_mode,
+        )
+
         # 分类标签页
         self._build_category_tabs()
 
-        # 任务列表容器
+        # 任务列表容器（只包含已构建控件的任务）
         self.task_list_column = ft.Column(
             controls=[],
             spacing=0,
+        )
+        self._rendered_tasks = None
+
+        # 可滚动区域：上下占位容器撑开窗口之外任务的高度
+        self.list_top_spacer = ft.Container(height=0)
+        self.list_bottom_spacer = ft.Container(height=0)
+        self.task_scroll_column = ft.Column(
+            controls=[self.list_top_spacer, self.task_list_column, self.list_bottom_spacer],
+            spacing=0,
             scroll=ft.ScrollMode.AUTO,
             expand=True,
+            on_scroll=self._on_task_list_scroll,
+            scroll_interval=100,
         )
 
         # 输入框
@@ -143,6 +222,8 @@ class TodoUI:
                         content=toolbar,
                         padding=ft.Padding(left=0, right=0, top=10, bottom=10),
                     ),
+                    # 搜索栏
+                    self.search_bar,
                     # 分类标签页
                     ft.Container(
                         content=self.category_tabs,
@@ -150,7 +231,7 @@ class TodoUI:
                     ),
                     # 任务列表区域
                     ft.Container(
-                        content=self.task_list_column,
+                        content=self.task_scroll_column,
                         expand=True,
                     ),
                     # 底部输入区域
@@ -176,6 +257,8 @@ class TodoUI:
         # 更新统计信息
         self._update_stats()
 
+        self.time_ticker.start()
+
         return self.main_card
 
     def _build_category_tabs(self):
@@ -212,6 +295,9 @@ class TodoUI:
             {"mode": "time_new", "label": "创建时间 (新→旧)", "icon": ft.Icons.ACCESS_TIME},
             {"mode": "time_old", "label": "创建时间 (旧→新)", "icon": ft.Icons.HISTORY},
             {"mode": "status", "label": "完成状态 (未完成优先)", "icon": ft.Icons.CHECK_CIRCLE_OUTLINE},
+            {"mode": "status_priority", "label": "未完成优先 → 优先级 → 最新", "icon": ft.Icons.FILTER_LIST},
+            {"mode": "priority_time", "label": "优先级 → 最新", "icon": ft.Icons.SORT},
+            {"mode": "status_time", "label": "未完成优先 → 最新", "icon": ft.Icons.VIEW_LIST},
         ]
 
         # 创建排序选项按钮
@@ -268,17 +354,10 @@ class TodoUI:
                     item.open = False
         self.page.update()
 
-    def rebuild_ui(self):
-        """重建UI以应用新主题"""
-        # 清空页面
-        self.page.clean()
-
-        # 重新构建UI
-        new_card = self.build_main_ui()
-        self.page.add(new_card)
-
-        # 刷新任务列表（会自动更新所有任务的主题）
-        self.refresh_task_list()
+    def update_theme_button(self, is_dark):
+        """更新主题切换按钮的图标（控件颜色使用主题令牌，随页面主题自动变化，无需重建）"""
+        if self.theme_button is not None:
+            self.theme_button.icon = ft.Icons.DARK_MODE if is_dark else ft.Icons.LIGHT_MODE
 
     def _on_add_category_clicked(self, e):
         """添加分类按钮点击处理"""
@@ -416,70 +495,86 @@ class TodoUI:
             self.page.update()
 
     def _on_search_clicked(self, e):
-        """搜索按钮点击处理"""
-        # 创建搜索输入框
-        search_field = ft.TextField(
-            hint_text="搜索任务...",
-            autofocus=True,
-            expand=True,
-        )
-
-        def close_dialog(e=None):
-            dialog.open = False
-            self.page.update()
-
-        def perform_search(e):
-            query = search_field.value
-            if query and query.strip():
-                self.search_mode = True
-                self.search_query = query.strip()
-                self._show_search_results()
-            close_dialog()
+        """搜索按钮点击处理：显示或关闭搜索栏"""
+        if self.search_bar.visible:
+            self._on_search_closed(e)
+            return
+        self.search_bar.visible = True
+        self.page.update()
 
-        def clear_search(e):
+    def _on_search_changed(self, e):
+        """搜索框输入处理：防抖后在后台线程中搜索"""
+        query = (self.search_field.value or "").strip()
+        if query == self.search_query:
+            return
+        if not query:
+            self._exit_search()
+            return
+        self.search_mode = True
+        self.search_query = query
+        self.live_search.submit(query)
+
+    def _on_search_closed(self, e):
+        """关闭搜索栏并恢复任务列表"""
+        self.search_field.value = ""
+        self.search_bar.visible = False
+        self._exit_search()
+
+    def _exit_search(self):
+        """退出搜索模式（私有方法）"""
+        self.live_search.cancel()
+        with self._render_lock:
             self.search_mode = False
             self.search_query = ""
+            # 搜索结果可能尚未显示，列表中仍是原来的窗口：释放的控件不能再复用，下次刷新完整重建
+            self._release_list_tasks([])
+            self._rendered_tasks = None
             self.refresh_task_list()
-            close_dialog()
-
-        dialog = ft.AlertDialog(
-            title=ft.Text("搜索任务"),
-            content=ft.Column(
-                controls=[
-                    search_field,
-                    ft.Text("提示：搜索任务标题和内容", size=12, color=ft.Colors.GREY_500),
-                ],
-                tight=True,
-                spacing=10,
-            ),
-            actions=[
-                ft.TextButton("取消", on_click=close_dialog),
-                ft.TextButton("清除搜索", on_click=clear_search),
-                ft.TextButton("搜索", on_click=perform_search),
-            ],
-        )
-
-        self.page.overlay.append(dialog)
-        dialog.open = True
-        self.page.update()
 
-    def _show_search_results(self):
+    def _on_search_results(self, query, tasks):
+        """搜索完成回调（后台线程）：只显示仍是当前查询的结果"""
+        with self._render_lock:
+            if self.search_mode and query == self.search_query:
+                self._show_search_results(tasks)
+
+    def _on_time_tick(self):
+        """定时刷新已显示任务的相对时间（后台线程），有变化时更新一次界面"""
+        with self._render_lock:
+            changed = False
+            for task in (self._rendered_tasks or []) + self._search_results:
+                changed = task.refresh_relative_time() or changed
+            if changed:
+                self.page.update()
+
+    def _release_list_tasks(self, keep):
+        """释放列表中不再显示的任务（窗口内任务或搜索结果）的控件（私有方法）"""
+        keep_ids = {task.get_id() for task in keep}
+        for task in (self._rendered_tasks or []) + self._search_results:
+            if task.get_id() not in keep_ids:
+                task.release_ui()
+        self._search_results = list(keep)
+
+    def _show_search_results(self, matching_tasks):
         """显示搜索结果"""
-        # 清空当前显示
-        self.task_list_column.controls.clear()
+        start = time.perf_counter()
+        restyles = (TodoItem.restyle_count, TodoItem.restyle_skipped_count)
 
-        # 搜索所有任务
-        query = self.search_query.lower()
-        matching_tasks = [
-            task for task in self.task_manager.get_all_tasks()
-            if query in task.get_text().lower()
-        ]
+        # 清空当前显示（列表中将出现非任务控件，下次刷新需完整重建）
+        shown_tasks = matching_tasks[:self.SEARCH_RESULT_LIMIT]
+        self._release_list_tasks(shown_tasks)
+        self.task_list_column.controls.clear()
+        self._rendered_tasks = None
+        self.list_top_spacer.height = 0
+        self.list_bottom_spacer.height = 0
 
         if matching_tasks:
-            # 添加搜索结果提示
+            # 添加搜索结果提示（结果已按相关度排序）
+            info = f"搜索结果: 找到 {len(matching_tasks)} 个任务"
+            if len(shown_tasks) < len(matching_tasks):
+                info += f"（显示前 {len(shown_tasks)} 个）"
             search_info = ft.Container(
                 content=ft.Text(
-                    f"搜索结果: 找到 {len(matching_tasks)} 个任务",
+                    info,
                     size=14,
                     color=self.theme_manager.get_secondary_color(),
                 ),
@@ -487,9 +582,8 @@ class TodoUI:
             )
             self.task_list_column.controls.append(search_info)
 
-            # 显示匹配的任务，并确保主题正确
-            for task in matching_tasks:
-                # 确保任务有最新的主题管理器
+            # 显示匹配的任务，并确保主题正确（未构建UI的任务只记录主题管理器）
+            for task in shown_tasks:
                 task.set_theme_manager(self.theme_manager)
                 self.task_list_column.controls.append(task.get_container())
         else:
@@ -508,6 +602,10 @@ class TodoUI:
             )
             self.task_list_column.controls.append(no_result)
 
+        self._record_refresh_stats({"inserted": len(shown_tasks), "removed": 0, "moved": 0}, start, restyles)
+        if self.DEBUG:
+            self._update_stats()
+
         # 更新界面
         self.page.update()
 
@@ -554,41 +652,224 @@ class TodoUI:
 
     def _update_stats(self):
         """更新统计信息"""
-        all_tasks = self.task_manager.get_all_tasks()
-        total = len(all_tasks)
-        completed = len(self.task_manager.get_completed_tasks())
-        pending = len(self.task_manager.get_pending_tasks())
+        stats = self.task_manager.get_stats()
+        total = stats.get_total()
+        completed = stats.get_completed()
+        pending = stats.get_pending()
 
         if total > 0:
-            completion_rate = (completed / total) * 100
+            completion_rate = stats.get_completion_rate()
             self.stats_text.value = f"总计 {total} 个任务 | 已完成 {completed} | 未完成 {pending} | 完成率 {completion_rate:.1f}%"
         else:
             self.stats_text.value = "还没有任务，快来添加吧！"
 
+        if self.loading_count is not None:
+            self.stats_text.value += f" | 正在加载…已加载 {self.loading_count} 个任务"
+
+        if self.DEBUG:
+            last = self.last_refresh_stats
+            self.stats_text.value += (
+                f" | 刷新: 插入 {last['inserted']} 移除 {last['removed']} 移动 {last['moved']}"
+                f" 重设颜色 {last['restyled']} 跳过 {last['restyle_skipped']} 耗时 {last['elapsed_ms']:.1f}ms"
+            )
+
+    def set_loading_progress(self, count):
+        """设置后台加载进度（count 为 None 表示加载完成）"""
+        self.loading_count = count
+
     def refresh_task_list(self):
         """刷新任务列表显示"""
-        # 清空当前显示
-        self.task_list_column.controls.clear()
+        with self._render_lock:
+            self._refresh_task_list()
+
+    def _refresh_task_list(self):
+        """刷新任务列表显示（私有方法，调用时持有渲染锁）"""
+        start = time.perf_counter()
+        restyles = (TodoItem.restyle_count, TodoItem.restyle_skipped_count)
 
         # 根据当前分类获取任务
         current_category = self.category_manager.get_current_category()
-        tasks = self.task_manager.get_tasks_by_category(current_category.get_name())
+        self._list_category = current_category.get_name()
+        self._list_count = self.task_manager.get_category_task_count(self._list_category)
 
-        # 重新添加任务，并确保每个任务都有最新的主题管理器
-        for task in tasks:
-            # 始终更新主题管理器（重要：主题切换时需要强制更新）
-            task.set_theme_manager(self.theme_manager)
-            self.task_list_column.controls.append(task.get_container())
+        if self.search_mode:
+            # 搜索模式：在后台重新搜索，任务列表由搜索结果回调更新
+            self.live_search.refresh()
+            stats = {"inserted": 0, "removed": 0, "moved": 0}
+        else:
+            # 按任务身份增量同步可见窗口内的列表控件
+            stats = self._render_window()
 
         # 重新构建分类按钮组（更新颜色和任务数量）
         self._rebuild_category_tabs()
 
+        self._record_refresh_stats(stats, start, restyles)
+
         # 更新统计信息
         self._update_stats()
 
         # 更新界面
         self.page.update()
 
+    def _record_refresh_stats(self, stats, start, restyles):
+        """记录本次刷新的开销：同步操作计数、重设颜色和跳过的任务数、耗时（不含发送页面更新）"""
+        stats["restyled"] = TodoItem.restyle_count - restyles[0]
+        stats["restyle_skipped"] = TodoItem.restyle_skipped_count - restyles[1]
+        stats["elapsed_ms"] = (time.perf_counter() - start) * 1000
+        self.last_refresh_stats = stats
+
+    def _render_window(self):
+        """渲染可见窗口（及缓冲区）内的任务，窗口外的任务只保留占位高度"""
+        count = self._list_count
+        if self.virtualized:
+            self.window_start = min(self.window_start, max(0, count - self.window_size))
+            lo = max(0, self.window_start - self.VIRTUAL_BUFFER)
+            hi = min(count, self.window_start + self.window_size + self.VIRTUAL_BUFFER)
+        else:
+            lo, hi = 0, count
+
+        self._window_range = (lo, hi)
+        self.list_top_spacer.height = lo * self.VIRTUAL_ITEM_EXTENT
+        self.list_bottom_spacer.height = (count - hi) * self.VIRTUAL_ITEM_EXTENT
+        # 只读取窗口内的任务，排序视图已增量维护，无需获取整个列表
+        return self._reconcile_task_list(self.task_manager.get_task_page(self._list_category, lo, hi))
+
+    def _on_task_list_scroll(self, e):
+        """任务列表滚动处理：可见范围接近已构建范围边缘时移动窗口"""
+        # 后台加载和搜索线程也会渲染列表，窗口状态和列表控件只在渲染锁内读写
+        with self._render_lock:
+            if not self.virtualized or self._rendered_tasks is None:
+                return
+
+            if e.viewport_dimension:
+                self.window_size = int(e.viewport_dimension // self.VIRTUAL_ITEM_EXTENT) + 1
+            first = self._index_at(e.pixels)
+            last = first + self.window_size
+
+            lo, hi = self._window_range
+            margin = self.VIRTUAL_BUFFER // 2
+            near_top = lo > 0 and first - lo < margin
+            near_bottom = hi < self._list_count and hi - last < margin
+            if not (near_top or near_bottom):
+                return
+
+            self.window_start = first
+            self._render_window()
+            self.page.update()
+
+    def _reconcile_task_list(self, tasks):
+        """增量同步任务列表控件，只插入、删除或移动发生变化的任务
+
+        返回本次同步的操作计数：inserted / removed / moved
+        """
+        stats = {"inserted": 0, "removed": 0, "moved": 0}
+        controls = self.task_list_column.controls
+        rendered = self._rendered_tasks
+
+        if rendered is None:
+            # 列表中可能有非任务控件（如搜索结果），完整重建
+            controls.clear()
+            for task in tasks:
+                # 新出现的任务需要同步主题
+                self._prepare_new_task(task)
+                controls.append(task.get_container())
+            self._rendered_tasks = list(tasks)
+            stats["inserted"] = len(tasks)
+            return stats
+
+        if rendered == tasks:
+            return stats
+
+        # 按任务 id 对应新旧列表；保留在原位置的任务为新顺序下的最长递增子序列，其余任务视为移动
+        new_positions = {task.get_id(): index for index, task in enumerate(tasks)}
+        kept = [task for task in rendered if task.get_id() in new_positions]
+        stable = self._stable_tasks(kept, new_positions)
+        stats["removed"] = len(rendered) - len(kept)
+        stats["moved"] = len(kept) - len(stable)
+
+        # 离开列表的任务释放控件，只保留数据
+        for task in rendered:
+            if task.get_id() not in new_positions:
+                task.release_ui()
+
+        # 删除已移除和需要移动的任务
+        if len(stable) != len(rendered):
+            rendered = [task for task in rendered if task.get_id() in stable]
+            controls[:] = [task.get_container() for task in rendered]
+
+        # 按新顺序插入缺失的任务（移动的任务重新插入，新任务需要同步主题）
+        existing = {task.get_id() for task in kept}
+        for index, task in enumerate(tasks):
+            if index < len(rendered) and rendered[index] is task:
+                continue
+            if task.get_id() not in existing:
+                self._prepare_new_task(task)
+                stats["inserted"] += 1
+            rendered.insert(index, task)
+            controls.insert(index, task.get_container())
+
+        self._rendered_tasks = rendered
+        return stats
+
+    def _prepare_new_task(self, task):
+        """准备新进入列表的任务：同步主题；虚拟列表中子任务默认折叠（私有方法）
+
+        折叠后窗口外的任务高度都为 VIRTUAL_ITEM_EXTENT，占位高度与实际布局一致；
+        用户在窗口内展开的任务离开窗口后再次进入时重新折叠。
+        """
+        if self.virtualized:
+            task.set_expanded(False)
+        task.set_theme_manager(self.theme_manager)
+
+    def _estimate_height(self, task):
+        """估算已构建任务的高度（像素）：展开时加上各子任务的高度"""
+        if task.expanded:
+            return self.VIRTUAL_ITEM_EXTENT + len(task.subtasks) * self.VIRTUAL_SUBTASK_EXTENT
+        return self.VIRTUAL_ITEM_EXTENT
+
+    def _index_at(self, pixels):
+        """估算滚动位置 pixels 处的任务下标
+
+        窗口外的任务都已折叠，按固定高度计算；窗口内的任务按各自是否展开估算高度。
+        """
+        lo = self._window_range[0]
+        offset = pixels - lo * self.VIRTUAL_ITEM_EXTENT
+        if offset < 0:
+            return max(0, int(pixels // self.VIRTUAL_ITEM_EXTENT))
+        index = lo
+        for task in self._rendered_tasks:
+            height = self._estimate_height(task)
+            if offset < height:
+                return index
+            offset -= height
+            index += 1
+        return index + int(offset // self.VIRTUAL_ITEM_EXTENT)
+
+    @staticmethod
+    def _stable_tasks(kept, new_positions):
+        """求出无需移动的任务 id 集合（按新位置的最长递增子序列）"""
+        tails = []  # tails[i]: 长度为 i+1 的递增子序列的最小结尾位置
+        tail_ids = []
+        parents = {}
+        for task in kept:
+            task_id = task.get_id()
+            position = new_positions[task_id]
+            i = bisect_left(tails, position)
+            parents[task_id] = tail_ids[i - 1] if i > 0 else None
+            if i == len(tails):
+                tails.append(position)
+                tail_ids.append(task_id)
+            else:
+                tails[i] = position
+                tail_ids[i] = task_id
+
+        stable = set()
+        task_id = tail_ids[-1] if tail_ids else None
+        while task_id is not None:
+            stable.add(task_id)
+            task_id = parents[task_id]
+        return stable
+
     def _rebuild_category_tabs(self):
         """重新构建分类标签按钮组"""
         # 清空旧按钮
@@ -766,9 +1047,8 @@ class TodoUI:
                 )
                 if result:
                     # 更新该分类下所有任务的分类名称
-                    for task in self.task_manager.get_all_tasks():
-                        if task.get_category() == category_name:
-                            task.set_category(new_name.strip())
+                    if new_name.strip() != category_name:
+                        self.task_manager.move_tasks_to_category(category_name, new_name.strip())
 
                     self._show_snackbar(f"已更新分类「{category_name}」")
                     # 刷新界面